@@ -0,0 +1,40 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import template_render_duration, thumbnail_duration
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            template_render_duration.observe(
+                time.perf_counter() - start,
+                template=self.template.name or '<string>',
+            )
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django templates whose top-level renders are timed for metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        start = time.perf_counter()
+        try:
+            super()._create_thumbnail(source_image, geometry_string, options,
+                                      thumbnail)
+        finally:
+            thumbnail_duration.observe(time.perf_counter() - start)
@@ -0,0 +1,174 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+CONTENT_VERSION_KEY = 'core:content_version'
+SCOPE_VERSION_KEY = 'core:content_version:{scope}'
+LOCK_KEY = '{key}:lock'
+UNCACHED_KEY = '{key}:uncached'
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache():
+    """Whether all worker processes see the same cache.
+
+    Only a shared backend such as memcached or Redis carries invalidations,
+    locks and notifications from one worker to the others.
+    """
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_content_version(scope=None):
+    """The version cached pages and feeds are rendered at.
+
+    A page showing a single ``scope``, such as one post, also goes stale
+    when only that scope is bumped.
+    """
+    version = get_version(CONTENT_VERSION_KEY)
+    if scope is None:
+        return version
+    return f'{version}.{get_version(SCOPE_VERSION_KEY.format(scope=scope))}'
+
+
+def get_page_scope(match):
+    """The scope of the page a URL resolved to, if it shows only one."""
+    scope = settings.ANON_PAGE_CACHE_SCOPES.get(match.view_name)
+    return scope and scope.format(**match.kwargs)
+
+
+def bump_content_version(scope=None):
+    """Invalidate every cached page at once by moving to a new version.
+
+    With a ``scope`` only the pages of that scope are invalidated.
+    """
+    key = (CONTENT_VERSION_KEY if scope is None
+           else SCOPE_VERSION_KEY.format(scope=scope))
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_version(key)
+
+
+def get_entry_timeout(timeout, value):
+    return timeout(value) if callable(timeout) else timeout
+
+
+def store(key, value, timeout, version=None, delta=0):
+    """Cache ``value`` as computed at ``version`` in ``delta`` seconds.
+
+    The entry outlives ``timeout`` by ``CACHE_STALE_TIMEOUT`` so it can be
+    served stale while it is recomputed. A ``timeout`` of 0 skips caching
+    and instead marks the key uncached for ``CACHE_UNCACHED_TIMEOUT``.
+    """
+    timeout = get_entry_timeout(timeout, value)
+    if timeout == 0:
+        cache.set(UNCACHED_KEY.format(key=key), (version,),
+                  settings.CACHE_UNCACHED_TIMEOUT)
+        return
+    if timeout is None:
+        cache.set(key, (value, version, None, delta), None)
+    else:
+        cache.set(key, (value, version, time.time() + timeout, delta),
+                  timeout + settings.CACHE_STALE_TIMEOUT)
+
+
+def is_fresh(entry, version):
+    """Whether an entry can be served without recomputing it.
+
+    Past its expiry or from an older version an entry is stale. Before
+    expiry it goes stale early with a probability that grows as expiry
+    nears and with the time it took to compute (XFetch), so one request
+    usually refreshes a hot entry before it expires for everybody.
+    """
+    _, entry_version, expires, delta = entry
+    if entry_version != version:
+        return False
+    if expires is None:
+        return True
+    beta = settings.CACHE_EARLY_RECOMPUTE_BETA
+    # random() may return 0.0 but never 1.0, so log() gets (0, 1].
+    gap = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + gap < expires
+
+
+def compute_and_store(key, compute, timeout, version):
+    start = time.perf_counter()
+    value = compute()
+    store(key, value, timeout, version, time.perf_counter() - start)
+    return value
+
+
+def get_or_compute(key, compute, timeout, version=None, name=None):
+    """Return the value cached at ``key``, calling ``compute`` on a miss.
+
+    Only one caller at a time recomputes a key: it takes a lock with
+    ``cache.add``, which is atomic across workers with a shared cache
+    backend. While it works, others are served the stale value, or wait
+    for the new one when there is none. Entries from another ``version``
+    are stale, so bumping a version refreshes without a stampede.
+
+    ``timeout`` may be a function of the computed value; returning 0
+    leaves that value uncached. Until the uncached mark expires, callers
+    then compute the key themselves without taking the lock or waiting.
+    ``name`` labels the cache in metrics.
+    """
+    uncached_key = UNCACHED_KEY.format(key=key)
+    entries = cache.get_many((key, uncached_key))
+    entry = entries.get(key)
+    if entry is not None and is_fresh(entry, version):
+        result = 'hit'
+        value = entry[0]
+    elif entries.get(uncached_key) == (version,):
+        result = 'bypass'
+        value = compute_and_store(key, compute, timeout, version)
+    else:
+        lock_key = LOCK_KEY.format(key=key)
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while True:
+            if cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+                result = 'miss' if entry is None else 'refresh'
+                try:
+                    value = compute_and_store(key, compute, timeout,
+                                              version)
+                finally:
+                    cache.delete(lock_key)
+                break
+            if entry is not None:
+                result = 'stale'
+                value = entry[0]
+                break
+            if time.monotonic() >= deadline:
+                result = 'miss'
+                value = compute_and_store(key, compute, timeout, version)
+                break
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            entries = cache.get_many((key, uncached_key))
+            entry = entries.get(key)
+            if entry is not None:
+                result = 'wait'
+                value = entry[0]
+                break
+            if entries.get(uncached_key) == (version,):
+                result = 'bypass'
+                value = compute_and_store(key, compute, timeout, version)
+                break
+    if name is not None:
+        metrics.cache_requests.inc(cache=name, result=result)
+    return value
@@ -0,0 +1,18 @@
+from django.core.checks import Warning, register
+
+from .cache import is_shared_cache
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Invalidations reach other workers only through a shared cache."""
+    if is_shared_cache():
+        return []
+    return [Warning(
+        'Кеш по умолчанию виден только своему процессу: после изменения '
+        'записей остальные воркеры продолжат отдавать устаревшие страницы '
+        'и объекты.',
+        hint='Укажите общий бэкенд, например memcached или Redis, '
+             'в YATUBE_CACHE_BACKEND и YATUBE_CACHE_LOCATION.',
+        id='core.W001',
+    )]
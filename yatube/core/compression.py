@@ -0,0 +1,149 @@
+import gzip
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'application/javascript',
+    'image/svg+xml',
+)
+STRONG_ETAG = re.compile(r'^"(.*)"$')
+
+
+def get_encodings():
+    """Supported encodings, the preferred one first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        key, _, value = params.strip().partition('=')
+        if key.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encodings = get_encodings()
+    qualities = {
+        encoding: accepted.get(encoding, accepted.get('*', 0.0))
+        for encoding in encodings
+    }
+    best = max(encodings, key=lambda encoding: (qualities[encoding],
+                                                -encodings.index(encoding)))
+    return best if qualities[best] > 0 else None
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').lower()
+    return (
+        not response.has_header('Content-Encoding')
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and (response.streaming
+             or len(response.content) >= settings.COMPRESSION_MIN_SIZE)
+    )
+
+
+def record_compression(encoding, size, compressed_size, cpu_time=0.0):
+    metrics.compression_cpu_seconds.inc(cpu_time, encoding=encoding)
+    metrics.compression_input_bytes.inc(size, encoding=encoding)
+    metrics.compression_output_bytes.inc(compressed_size, encoding=encoding)
+
+
+def compress(data, encoding, level):
+    """Compress ``data`` and measure the CPU time it took."""
+    start = time.thread_time()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=level)
+    else:
+        compressed = gzip.compress(data, compresslevel=level, mtime=0)
+    cpu_time = time.thread_time() - start
+    record_compression(encoding, len(data), len(compressed), cpu_time)
+    return compressed, cpu_time
+
+
+def get_compressor(encoding, level):
+    """``(process, flush, finish)`` of an incremental compressor."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush)
+
+
+def iter_compressed(chunks, encoding, level):
+    """Compress a stream chunk by chunk.
+
+    Every chunk is flushed, so a client reading a slow stream, such as
+    server-sent events, gets each chunk as soon as it is produced.
+    """
+    process, flush, finish = get_compressor(encoding, level)
+    for chunk in chunks:
+        start = time.thread_time()
+        compressed = process(chunk) + flush()
+        record_compression(encoding, len(chunk), len(compressed),
+                           time.thread_time() - start)
+        yield compressed
+    start = time.thread_time()
+    compressed = finish()
+    record_compression(encoding, 0, len(compressed),
+                       time.thread_time() - start)
+    yield compressed
+
+
+def set_encoding_headers(response, encoding):
+    response['Content-Encoding'] = encoding
+    if response.has_header('ETag'):
+        response['ETag'] = STRONG_ETAG.sub(r'W/"\1"', response['ETag'])
+
+
+def compress_response(response, encoding, content=None):
+    """Encode ``response`` in place with ``encoding``.
+
+    ``content`` is an already compressed body, e.g. taken from the cache.
+    A body that does not get smaller is left as it is.
+    """
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if response.streaming:
+        response.streaming_content = iter_compressed(
+            response.streaming_content, encoding,
+            settings.COMPRESSION_LEVELS[encoding])
+        del response['Content-Length']
+    else:
+        if content is None:
+            content, _ = compress(response.content, encoding,
+                                  settings.COMPRESSION_LEVELS[encoding])
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+    set_encoding_headers(response, encoding)
+    return response
@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from . import metrics
+
+
+def pbkdf2_base64(password, salt, iterations, digest):
+    """The same value as Django's PBKDF2 hasher, importable by workers."""
+    hash = hashlib.pbkdf2_hmac(digest, password.encode(), salt.encode(),
+                               iterations)
+    return base64.b64encode(hash).decode('ascii').strip()
+
+
+class HashingPool:
+    """A process pool that password hashing is offloaded to.
+
+    At most ``PASSWORD_HASHING_WORKERS`` cores hash at once, so a burst of
+    logins queues here instead of taking every core from page rendering.
+    No more than ``PASSWORD_HASHING_MAX_PENDING`` hashes wait for the pool;
+    further callers block before submitting. Without workers configured
+    hashing runs inline.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # Workers are spawned, not forked: forking a threaded
+                # server copies locks held by other threads.
+                self.executor = ProcessPoolExecutor(
+                    settings.PASSWORD_HASHING_WORKERS,
+                    mp_context=get_context('spawn'),
+                )
+                self.slots = threading.BoundedSemaphore(
+                    settings.PASSWORD_HASHING_MAX_PENDING)
+            return self.executor, self.slots
+
+    def run(self, func, *args):
+        start = time.perf_counter()
+        if not settings.PASSWORD_HASHING_WORKERS:
+            result = func(*args)
+            worker = 'inline'
+        else:
+            executor, slots = self.get_executor()
+            with slots:
+                result = executor.submit(func, *args).result()
+            worker = 'pool'
+        metrics.password_hash_duration.observe(
+            time.perf_counter() - start, worker=worker)
+        return result
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+            self.slots = None
+
+
+hashing_pool = HashingPool()
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with ``PASSWORD_HASH_ITERATIONS``, run in the pool.
+
+    Hashes keep Django's format, so existing passwords verify as before.
+    When the setting changes, ``must_update`` makes a successful login
+    store the password again with the new iteration count.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+        hash = hashing_pool.run(pbkdf2_base64, password, salt, iterations,
+                                self.digest().name)
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
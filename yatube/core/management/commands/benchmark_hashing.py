@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from core.hashers import hashing_pool, pbkdf2_base64
+
+PASSWORD = 'benchmark-password'
+SALT = 'benchmarksalt'
+
+
+class Command(BaseCommand):
+    help = ('Измеряет, сколько входов в секунду выдерживает одно ядро '
+            'и пул хеширования при текущих настройках хешера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20,
+                            help='Сколько паролей проверить на каждом шаге')
+        parser.add_argument('--iterations', type=int,
+                            help='Число итераций PBKDF2; по умолчанию '
+                                 'PASSWORD_HASH_ITERATIONS')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        iterations = (options['iterations']
+                      or settings.PASSWORD_HASH_ITERATIONS)
+        hasher = get_hasher()
+        encoded = hasher.encode(PASSWORD, SALT, iterations)
+
+        start = time.perf_counter()
+        for _ in range(count):
+            pbkdf2_base64(PASSWORD, SALT, iterations, hasher.digest().name)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'PBKDF2, итераций {iterations}: '
+            f'{elapsed / count * 1000:.1f} мс на вход, '
+            f'{count / elapsed:.1f} входов в секунду на ядро'
+        )
+
+        workers = settings.PASSWORD_HASHING_WORKERS
+        if not workers:
+            self.stdout.write('Пул хеширования выключен, пароли '
+                              'проверяются в потоке запроса')
+            return
+        with ThreadPoolExecutor(workers * 2) as threads:
+            # The first round spawns the workers.
+            list(threads.map(lambda _: hasher.verify(PASSWORD, encoded),
+                             range(workers)))
+            start = time.perf_counter()
+            list(threads.map(lambda _: hasher.verify(PASSWORD, encoded),
+                             range(count)))
+            elapsed = time.perf_counter() - start
+        hashing_pool.shutdown()
+        self.stdout.write(
+            f'Пул из {workers} процессов: {count / elapsed:.1f} входов '
+            f'в секунду, {count / elapsed / workers:.1f} на ядро'
+        )
@@ -0,0 +1,40 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core.startup import run_startup_probe
+
+
+class Command(BaseCommand):
+    help = ('Измеряет холодный старт воркера: время импорта модулей при '
+            'django.setup() и при обработке первого запроса')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/',
+                            help='Адрес первого запроса')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Сколько самых медленных модулей показать')
+        parser.add_argument('--by-package', action='store_true',
+                            help='Суммировать время по пакетам верхнего '
+                                 'уровня')
+
+    def handle(self, *args, **options):
+        report = run_startup_probe(options['path'])
+        self.stdout.write(
+            f"django.setup(): {report['setup'] * 1000:.0f} мс, "
+            f"первый запрос {options['path']} ({report['status']}): "
+            f"{report['first_request'] * 1000:.0f} мс"
+        )
+        for phase, imports in report['imports'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{phase}: импортировано модулей {len(imports)}'
+            ))
+            rows = [(name, self_us) for name, self_us, _ in imports]
+            if options['by_package']:
+                packages = defaultdict(int)
+                for name, self_us in rows:
+                    packages[name.split('.')[0]] += self_us
+                rows = packages.items()
+            rows = sorted(rows, key=lambda row: row[1], reverse=True)
+            for name, self_us in rows[:options['limit']]:
+                self.stdout.write(f'{self_us / 1000:9.1f} мс  {name}')
@@ -0,0 +1,78 @@
+import glob
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.views = Counter()
+        self.locations = Counter()
+        self.sql = None
+        self.plan = None
+
+    def add(self, entry):
+        self.count += 1
+        self.total += entry['duration']
+        self.max = max(self.max, entry['duration'])
+        self.views[entry['view']] += 1
+        if entry.get('location'):
+            self.locations[entry['location']] += 1
+        self.sql = entry.get('sql', self.sql)
+        self.plan = entry.get('plan', self.plan)
+
+
+class Command(BaseCommand):
+    help = ('Сводка медленных запросов из журнала: самые затратные '
+            'запросы по суммарному времени')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG,
+                            help='Путь к журналу медленных запросов')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Сколько запросов показать')
+        parser.add_argument('--order', choices=('total', 'count', 'max'),
+                            default='total',
+                            help='Порядок сортировки')
+
+    def read_entries(self, path):
+        for log_path in sorted(glob.glob(f'{glob.escape(path)}*'),
+                               reverse=True):
+            with open(log_path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def handle(self, *args, **options):
+        stats = {}
+        for entry in self.read_entries(options['log']):
+            stats.setdefault(entry['fingerprint'], QueryStats()).add(entry)
+        if not stats:
+            self.stdout.write('Медленных запросов не найдено')
+            return
+        order = options['order']
+        top = sorted(stats.items(), key=lambda item: getattr(item[1], order),
+                     reverse=True)[:options['limit']]
+        for fingerprint, query in top:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'\n{fingerprint}: {query.count} раз, '
+                f'всего {query.total * 1000:.0f} мс, '
+                f'макс. {query.max * 1000:.0f} мс, '
+                f'в среднем {query.total / query.count * 1000:.0f} мс'
+            ))
+            self.stdout.write(query.sql or '(текст запроса не сохранён)')
+            views = ', '.join(
+                f'{view} ({count})' for view, count in
+                query.views.most_common(3))
+            self.stdout.write(f'Представления: {views}')
+            for location, count in query.locations.most_common(3):
+                self.stdout.write(f'  {location} ({count})')
+            for row in query.plan or ():
+                self.stdout.write(f'  план: {row}')
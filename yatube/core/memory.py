@@ -0,0 +1,137 @@
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db.models import Model, QuerySet
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+
+
+def stop_tracing():
+    tracemalloc.stop()
+    snapshots.clear()
+
+
+def count_instances():
+    """Live model instances and evaluated querysets, by model."""
+    counts = Counter()
+    for obj in gc.get_objects():
+        # type() rather than isinstance(): isinstance() reads __class__,
+        # which evaluates lazy objects.
+        cls = type(obj)
+        if issubclass(cls, Model):
+            counts[obj._meta.label] += 1
+        elif issubclass(cls, QuerySet) and obj._result_cache is not None:
+            counts[f'QuerySet[{obj.model._meta.label}]'] += 1
+    return counts
+
+
+def format_frame(frame):
+    filename = os.path.abspath(frame.filename)
+    if filename.startswith(settings.BASE_DIR):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return f'{filename}:{frame.lineno}'
+
+
+def get_code_location(traceback):
+    """The innermost project frame of an allocation, else the innermost one.
+
+    Most memory is allocated inside Django and the standard library; the
+    project frame that called into them is the one worth fixing.
+    """
+    for frame in reversed(traceback):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(settings.BASE_DIR)
+                and 'site-packages' not in filename):
+            return format_frame(frame)
+    return format_frame(traceback[-1])
+
+
+class Snapshot:
+    def __init__(self, label):
+        gc.collect()
+        self.label = label
+        self.time = time.time()
+        self.traces = tracemalloc.take_snapshot().filter_traces(
+            SNAPSHOT_FILTERS)
+        self.traced_memory = tracemalloc.get_traced_memory()[0]
+        self.instances = count_instances()
+
+
+def diff_snapshots(old, new, limit=None):
+    """Memory growth from ``old`` to ``new`` by code location and model."""
+    limit = limit or settings.MEMORY_DIFF_LIMIT
+    sizes = Counter()
+    counts = Counter()
+    for stat in new.traces.compare_to(old.traces, 'traceback'):
+        location = get_code_location(stat.traceback)
+        sizes[location] += stat.size_diff
+        counts[location] += stat.count_diff
+    instances = new.instances.copy()
+    instances.subtract(old.instances)
+    return {
+        'from': old.label,
+        'to': new.label,
+        'seconds': round(new.time - old.time, 3),
+        'growth': new.traced_memory - old.traced_memory,
+        'locations': [
+            {'location': location, 'size_diff': size_diff,
+             'count_diff': counts[location]}
+            for location, size_diff in sizes.most_common(limit)
+            if size_diff > 0
+        ],
+        'instances': [
+            {'model': label, 'count_diff': count_diff,
+             'count': new.instances[label]}
+            for label, count_diff in instances.most_common(limit)
+            if count_diff > 0
+        ],
+    }
+
+
+class SnapshotStore:
+    """The last ``MEMORY_SNAPSHOT_LIMIT`` snapshots of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = OrderedDict()
+
+    def take(self, label=None):
+        start_tracing()
+        label = label or time.strftime('%H:%M:%S')
+        snapshot = Snapshot(label)
+        with self.lock:
+            self.snapshots.pop(label, None)
+            self.snapshots[label] = snapshot
+            while len(self.snapshots) > settings.MEMORY_SNAPSHOT_LIMIT:
+                self.snapshots.popitem(last=False)
+        return snapshot
+
+    def get(self, label):
+        with self.lock:
+            return self.snapshots.get(label)
+
+    def labels(self):
+        with self.lock:
+            return list(self.snapshots)
+
+    def clear(self):
+        with self.lock:
+            self.snapshots.clear()
+
+
+snapshots = SnapshotStore()
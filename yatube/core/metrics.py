@@ -0,0 +1,327 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                    2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+DEAD_SNAPSHOT_NAME = 'dead.json'
+LOCK_NAME = 'dead.lock'
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def escape_label(value):
+    return (value.replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        f'{name}="{escape_label(str(value))}"' for name, value in pairs)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        registry.register(self)
+
+    def get_key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def merge(self, current, other):
+        return current + other
+
+    def render(self, values):
+        for key, value in sorted(values.items()):
+            yield (f'{self.name}{format_labels(self.labelnames, key)} '
+                   f'{value}')
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, plus their sum.
+
+    Values are stored as per-bucket counts with the sum last and only made
+    cumulative when rendered, so snapshots of several processes add up
+    element by element.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DURATION_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def merge(self, current, other):
+        return [a + b for a, b in zip(current, other)]
+
+    def render(self, values):
+        for key, counts in sorted(values.items()):
+            total = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                total += count
+                labels = format_labels(self.labelnames, key,
+                                       (('le', bound),))
+                yield f'{self.name}_bucket{labels} {total}'
+            labels = format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {counts[-1]}'
+            yield f'{self.name}_count{labels} {total}'
+
+
+class MetricsRegistry:
+    """Metrics of this process, shared with its siblings through files.
+
+    Every worker periodically writes a snapshot to ``METRICS_DIR`` under
+    its pid. A scrape sums the live values of the answering worker with
+    the files of all the others, so the totals cover the whole host no
+    matter which worker gets the request. Counters and histograms of
+    workers that are gone are folded into one file of their own, so the
+    totals never go down when a worker restarts; gauges are dropped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.last_dump = time.monotonic()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return Counter(self, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        return Histogram(self, name, documentation, labelnames, **kwargs)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in
+                       metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values = {}
+
+    def get_dump_path(self):
+        return os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+
+    def dump(self):
+        if not settings.METRICS_DIR:
+            return
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        self.write_snapshot(self.get_dump_path(), self.snapshot())
+        self.last_dump = time.monotonic()
+
+    def maybe_dump(self):
+        if (time.monotonic() - self.last_dump
+                >= settings.METRICS_DUMP_INTERVAL):
+            self.dump()
+
+    def load_snapshot(self, path):
+        try:
+            with open(path) as dump_file:
+                return json.load(dump_file)
+        except (OSError, ValueError):
+            return None
+
+    def write_snapshot(self, path, snapshot):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as dump_file:
+            json.dump(snapshot, dump_file)
+        os.replace(temp_path, path)
+
+    def merge_snapshot(self, totals, snapshot, keep_gauges=True):
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None or (metric.kind == 'gauge'
+                                  and not keep_gauges):
+                continue
+            merged = totals.setdefault(name, {})
+            for key, value in values:
+                key = tuple(key)
+                if key in merged:
+                    merged[key] = metric.merge(merged[key], value)
+                else:
+                    merged[key] = value
+
+    def merge_dead_snapshots(self):
+        """Fold the files of workers that have exited into one.
+
+        Scrapes by several workers may overlap, so this runs under a file
+        lock and skips files another scrape has already folded.
+        """
+        dead_paths = []
+        with os.scandir(settings.METRICS_DIR) as entries:
+            for entry in entries:
+                pid = entry.name[:-len('.json')]
+                if (entry.name.endswith('.json') and pid.isdigit()
+                        and not is_running(int(pid))):
+                    dead_paths.append(entry.path)
+        if not dead_paths:
+            return
+        dead_path = os.path.join(settings.METRICS_DIR, DEAD_SNAPSHOT_NAME)
+        with open(os.path.join(settings.METRICS_DIR, LOCK_NAME),
+                  'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            totals = {}
+            self.merge_snapshot(totals, self.load_snapshot(dead_path) or {})
+            for path in dead_paths:
+                if not os.path.exists(path):
+                    continue
+                self.merge_snapshot(totals, self.load_snapshot(path) or {},
+                                    keep_gauges=False)
+            self.write_snapshot(dead_path, {
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in totals.items()
+            })
+            for path in dead_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def iter_snapshots(self):
+        yield self.snapshot()
+        if not settings.METRICS_DIR or not os.path.isdir(
+                settings.METRICS_DIR):
+            return
+        self.merge_dead_snapshots()
+        own_path = self.get_dump_path()
+        with os.scandir(settings.METRICS_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json') or entry.path == own_path:
+                    continue
+                snapshot = self.load_snapshot(entry.path)
+                if snapshot is not None:
+                    yield snapshot
+
+    def collect(self):
+        totals = {name: {} for name in self.metrics}
+        for snapshot in self.iter_snapshots():
+            self.merge_snapshot(totals, snapshot)
+        return totals
+
+    def render(self):
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+view_duration = registry.histogram(
+    'yatube_view_duration_seconds',
+    'Time spent serving a request, by URL name.',
+    ('view',),
+)
+db_query_duration = registry.histogram(
+    'yatube_db_query_duration_seconds',
+    'Time spent in single database queries, by URL name.',
+    ('view',),
+)
+db_queries_per_request = registry.histogram(
+    'yatube_db_queries_per_request',
+    'Number of database queries made by one request, by URL name.',
+    ('view',),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+cache_requests = registry.counter(
+    'yatube_cache_requests_total',
+    'Application cache lookups, by cache and result: hit, miss, refresh '
+    '(recomputed before expiry or after it), stale or wait (served while '
+    'another request recomputed), bypass (computed without the lock, as '
+    'the last value was not cacheable).',
+    ('cache', 'result'),
+)
+thumbnail_duration = registry.histogram(
+    'yatube_thumbnail_duration_seconds',
+    'Time spent generating a thumbnail.',
+)
+template_render_duration = registry.histogram(
+    'yatube_template_render_duration_seconds',
+    'Time spent rendering a top-level template.',
+    ('template',),
+)
+compression_cpu_seconds = registry.counter(
+    'yatube_compression_cpu_seconds_total',
+    'CPU time spent compressing responses, by encoding.',
+    ('encoding',),
+)
+compression_saved_cpu_seconds = registry.counter(
+    'yatube_compression_saved_cpu_seconds_total',
+    'CPU time not spent thanks to cached compressed pages, by encoding.',
+    ('encoding',),
+)
+compression_input_bytes = registry.counter(
+    'yatube_compression_input_bytes_total',
+    'Bytes of response bodies before compression, by encoding.',
+    ('encoding',),
+)
+compression_output_bytes = registry.counter(
+    'yatube_compression_output_bytes_total',
+    'Bytes of response bodies after compression, by encoding; divided by '
+    'the input bytes gives the compression ratio.',
+    ('encoding',),
+)
+throttled_requests = registry.counter(
+    'yatube_throttled_requests_total',
+    'Requests rejected by rate limiting, by scope and URL name.',
+    ('scope', 'view'),
+)
+password_hash_duration = registry.histogram(
+    'yatube_password_hash_duration_seconds',
+    'Wall time of a password hash, queueing included, by where it ran.',
+    ('worker',),
+)
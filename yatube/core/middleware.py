@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from . import metrics
+from .cache import get_content_version, get_or_compute, get_page_scope
+from .compression import (choose_encoding, compress, compress_response,
+                          is_compressible, record_compression)
+from .memory import start_tracing
+from .slow_queries import slow_query_log
+
+memory_logger = logging.getLogger('yatube.memory')
+
+PAGE_KEY = 'core:page:{digest}'
+PAGE_VARIANT_KEY = '{key}:{encoding}:{digest}'
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve whole pages to anonymous visitors straight from the cache.
+
+    Placed before the session and auth middleware: a request without a
+    session cookie is anonymous, so a hit touches neither the ORM nor the
+    template engine. Cached pages go stale together whenever content
+    changes, and a page listed in ``ANON_PAGE_CACHE_SCOPES`` also when
+    its own scope changes; one request renders a stale page again while
+    concurrent ones are served the old copy. URLs whose last response
+    could not be cached, such as 404s and redirects, are rendered by every
+    request at once instead of one at a time.
+
+    Next to every page its gzip and brotli bodies are cached the first time
+    a client asks for them, compressed once at the highest level, so a hit
+    never compresses again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        if not self.is_cacheable_request(request, match):
+            return self.get_response(request)
+        key = PAGE_KEY.format(digest=hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest())
+        response = get_or_compute(
+            key, lambda: self.render(request), self.get_timeout,
+            version=get_content_version(get_page_scope(match)), name='page')
+        if not self.is_cacheable_response(response):
+            return response
+        response = get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response,
+        )
+        if response.status_code != 200:
+            return response
+        return self.encode(request, key, response)
+
+    def render(self, request):
+        response = self.get_response(request)
+        if self.is_cacheable_response(response) and is_compressible(response):
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def get_timeout(self, response):
+        if self.is_cacheable_response(response):
+            return settings.ANON_PAGE_CACHE_TIMEOUT
+        return 0
+
+    def encode(self, request, key, response):
+        encoding = choose_encoding(request)
+        if encoding is None or not is_compressible(response):
+            return response
+        # The page body is in the key: a stale page is never sent with the
+        # compressed body of a newer one.
+        variant_key = PAGE_VARIANT_KEY.format(
+            key=key, encoding=encoding,
+            digest=hashlib.md5(response.content).hexdigest())
+        compressed = False
+
+        def compress_page():
+            nonlocal compressed
+            compressed = True
+            return compress(response.content, encoding,
+                            settings.COMPRESSION_CACHED_LEVELS[encoding])
+
+        content, cpu_time = get_or_compute(
+            variant_key, compress_page, settings.ANON_PAGE_CACHE_TIMEOUT,
+            name='page_variant')
+        if not compressed:
+            metrics.compression_saved_cpu_seconds.inc(cpu_time,
+                                                      encoding=encoding)
+            record_compression(encoding, len(response.content), len(content))
+        return compress_response(response, encoding, content)
+
+    def is_cacheable_request(self, request, match):
+        if request.method != 'GET':
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        return (match.namespace in settings.ANON_PAGE_CACHE_NAMESPACES
+                and match.view_name
+                not in settings.ANON_PAGE_CACHE_EXCLUDED_VIEWS)
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+
+class CompressionMiddleware:
+    """Compress text responses with the best encoding the client accepts.
+
+    Streaming responses are compressed chunk by chunk as they are sent.
+    Pages coming from the page cache are already encoded and pass through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        return compress_response(response, encoding)
+
+
+def get_view_label(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return 'unresolved'
+    if match.namespace in settings.METRICS_VIEW_NAMESPACES:
+        return match.view_name
+    return 'other'
+
+
+class QueryTimer:
+    def __init__(self, view):
+        self.view = view
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.db_query_duration.observe(duration, view=self.view)
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            slow_query_log.record(context['connection'], sql, params, many,
+                                  duration, self.view)
+        return result
+
+
+class MetricsMiddleware:
+    """Time every request and the database queries it makes.
+
+    Placed before the page cache, so cached responses are measured too.
+    Queries slower than ``SLOW_QUERY_THRESHOLD`` also go to the slow-query
+    log. The process snapshot for the ``/metrics`` endpoint is written here
+    at most once per ``METRICS_DUMP_INTERVAL``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        view = get_view_label(request.path_info)
+        query_timer = QueryTimer(view)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_timer))
+            response = self.get_response(request)
+        metrics.view_duration.observe(time.perf_counter() - start, view=view)
+        metrics.db_queries_per_request.observe(query_timer.count, view=view)
+        metrics.registry.maybe_dump()
+        return response
+
+
+class MemoryMiddleware:
+    """Log requests that allocate more than ``MEMORY_PEAK_THRESHOLD``.
+
+    Works while ``tracemalloc`` is tracing: from startup with
+    ``MEMORY_TRACE`` or after a snapshot is taken on the diagnostics page.
+    The peak is process-wide, so under a threaded server it also includes
+    whatever concurrent requests allocated meanwhile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.MEMORY_TRACE:
+            start_tracing()
+
+    def __call__(self, request):
+        if not tracemalloc.is_tracing():
+            return self.get_response(request)
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        response = self.get_response(request)
+        current, peak = tracemalloc.get_traced_memory()
+        if peak - start >= settings.MEMORY_PEAK_THRESHOLD:
+            memory_logger.warning(json.dumps({
+                'time': time.time(),
+                'path': request.path,
+                'view': get_view_label(request.path_info),
+                'peak': peak - start,
+                'retained': current - start,
+            }))
+        return response
@@ -0,0 +1,125 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import URLPattern
+
+from . import metrics
+
+BUCKET_KEY = 'core:ratelimit:{view}:{kind}:{digest}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+def take_token(key, rate):
+    """Take a token from the bucket at ``key``.
+
+    A bucket holds up to ``count`` tokens and refills at ``count`` per
+    period. Returns 0 when a token was taken, otherwise the seconds until
+    the next one. The read and the write are not atomic, so concurrent
+    requests may slightly overdraw a bucket.
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time()
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    wait = 0 if tokens >= 1 else (1 - tokens) / refill
+    if not wait:
+        tokens -= 1
+    cache.set(key, (tokens, now), period)
+    return wait
+
+
+def get_client_ip(request):
+    """The client address as the outermost trusted proxy saw it.
+
+    Behind ``TRUSTED_PROXY_COUNT`` reverse proxies it is taken from
+    ``CLIENT_IP_HEADER``. Every proxy appends the address it got the
+    request from, so the entries before the outermost proxy's are up to
+    the client and are ignored.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    if not settings.TRUSTED_PROXY_COUNT:
+        return remote_addr
+    addresses = [
+        address.strip() for address in
+        request.META.get(settings.CLIENT_IP_HEADER, '').split(',')
+        if address.strip()
+    ]
+    if len(addresses) < settings.TRUSTED_PROXY_COUNT:
+        return remote_addr
+    return addresses[-settings.TRUSTED_PROXY_COUNT]
+
+
+def get_client_identities(request):
+    """Who is making the request: the address, and the user if logged in.
+
+    Anonymous clients are only told apart by address, so dropping the
+    session cookie does not get a client a fresh bucket.
+    """
+    identities = {'ip': get_client_ip(request)}
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        identities['user'] = str(user.pk)
+    return identities
+
+
+def check_rate_limit(request, scope, view):
+    identities = get_client_identities(request)
+    wait = 0
+    for kind, rate in settings.RATE_LIMITS[scope].items():
+        identity = identities.get(kind)
+        if identity is None:
+            continue
+        key = BUCKET_KEY.format(
+            view=view, kind=kind,
+            digest=hashlib.md5(identity.encode()).hexdigest())
+        wait = max(wait, take_token(key, rate))
+    return wait
+
+
+def rate_limit(scope, methods=('POST',)):
+    """Throttle ``methods`` of a view with the buckets of ``scope``.
+
+    Apply it outermost, above ``login_required``, so a throttled request
+    is answered with 429 before any ORM work beyond loading the user.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            view_name = request.resolver_match.view_name
+            wait = check_rate_limit(request, scope, view_name)
+            if not wait:
+                return view(request, *args, **kwargs)
+            metrics.throttled_requests.inc(scope=scope, view=view_name)
+            response = HttpResponse(
+                'Слишком много запросов, попробуйте позже',
+                content_type='text/plain; charset=utf-8', status=429)
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def rate_limit_patterns(scope, patterns, methods=('POST',)):
+    """``patterns`` of another app with every view rate-limited."""
+    return [
+        URLPattern(pattern.pattern,
+                   rate_limit(scope, methods)(pattern.callback),
+                   pattern.default_args, pattern.name)
+        for pattern in patterns
+    ]
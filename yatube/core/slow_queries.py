@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger('yatube.slow_queries')
+
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize_sql(sql):
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def get_fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:12]
+
+
+def get_location():
+    """The innermost project frame outside ``core`` that ran the query."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename.startswith(settings.BASE_DIR)
+                and not filename.startswith(CORE_DIR)
+                and 'site-packages' not in filename):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def explain(connection, sql, params):
+    prefix = ('EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+              else 'EXPLAIN ')
+    # A backend cursor skips the execute wrappers, so the EXPLAIN is
+    # neither timed nor logged itself.
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except DatabaseError:
+        return None
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Write queries slower than ``SLOW_QUERY_THRESHOLD`` to a log.
+
+    Every slow execution is logged as one JSON line keyed by the
+    fingerprint of its normalized SQL. The SQL text and its plan are only
+    included, and EXPLAIN only run, for the first occurrence of a
+    fingerprint in every ``SLOW_QUERY_EXPLAIN_INTERVAL``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.explained = {}
+
+    def should_explain(self, fingerprint):
+        now = time.monotonic()
+        with self.lock:
+            last = self.explained.get(fingerprint)
+            if (last is not None
+                    and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL):
+                return False
+            self.explained[fingerprint] = now
+            return True
+
+    def record(self, connection, sql, params, many, duration, view):
+        normalized = normalize_sql(sql)
+        fingerprint = get_fingerprint(normalized)
+        entry = {
+            'time': time.time(),
+            'fingerprint': fingerprint,
+            'duration': round(duration, 6),
+            'view': view,
+            'location': get_location(),
+        }
+        if self.should_explain(fingerprint):
+            entry['sql'] = normalized
+            is_select = sql.lstrip()[:6].upper() == 'SELECT'
+            if is_select and not many:
+                entry['plan'] = explain(connection, sql, params)
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+    def clear(self):
+        with self.lock:
+            self.explained.clear()
+
+
+slow_query_log = SlowQueryLog()
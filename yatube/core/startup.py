@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+PHASE_MARKER = '@@phase '
+
+PROBE_SCRIPT = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from yatube.wsgi import application
+setup = time.perf_counter()
+print({marker!r} + 'first_request', file=sys.stderr, flush=True)
+environ = {{'PATH_INFO': {path!r}}}
+setup_testing_defaults(environ)
+statuses = []
+body = application(environ, lambda status, headers: statuses.append(status))
+b''.join(body)
+first_request = time.perf_counter()
+print(json.dumps({{
+    'status': statuses[0],
+    'setup': setup - start,
+    'first_request': first_request - setup,
+}}))
+'''
+
+
+def parse_importtime(lines):
+    phases = {'setup': []}
+    phase = phases['setup']
+    for line in lines:
+        if line.startswith(PHASE_MARKER):
+            phase = phases.setdefault(line[len(PHASE_MARKER):].strip(), [])
+            continue
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        phase.append((name.strip(), int(self_us), int(cumulative_us)))
+    return phases
+
+
+def run_startup_probe(path='/'):
+    """Start a fresh interpreter, load the WSGI app and serve ``path``.
+
+    Returns wall-clock timings of both phases together with the modules
+    imported in each of them, as reported by ``python -X importtime``.
+    """
+    env = dict(os.environ,
+               DJANGO_SETTINGS_MODULE=os.environ.get(
+                   'DJANGO_SETTINGS_MODULE', 'yatube.settings'))
+    script = PROBE_SCRIPT.format(marker=PHASE_MARKER, path=path)
+    result = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', script),
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr.splitlines())
+    return report
@@ -0,0 +1,174 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..cache import LOCK_KEY, bump_content_version, get_or_compute, store
+from ..checks import check_shared_cache
+from ..metrics import registry
+
+User = get_user_model()
+
+
+class GetOrComputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'значение {self.calls}'
+
+    def get(self, version=None, timeout=60):
+        return get_or_compute('test', self.compute, timeout, version=version,
+                              name='test')
+
+    def assertResult(self, result, count):
+        metrics = Client().get(reverse('metrics')).content.decode()
+        self.assertIn(f'yatube_cache_requests_total{{cache="test",'
+                      f'result="{result}"}} {count}', metrics)
+
+    def test_hit_and_miss(self):
+        """Значение вычисляется один раз и дальше берётся из кеша."""
+        self.assertEqual(self.get(), 'значение 1')
+        self.assertEqual(self.get(), 'значение 1')
+        self.assertResult('miss', 1)
+        self.assertResult('hit', 1)
+
+    def test_none_is_cached(self):
+        """None тоже кешируется и не вызывает повторного вычисления."""
+        for _ in range(2):
+            self.assertIsNone(get_or_compute('test', lambda: None, 60))
+        self.assertEqual(cache.get('test')[0], None)
+
+    def test_zero_timeout_skips_caching(self):
+        """Значение с нулевым временем жизни не попадает в кеш."""
+        self.get(timeout=lambda value: 0)
+        self.assertIsNone(cache.get('test'))
+
+    def test_uncached_value_skips_lock(self):
+        """После некешируемого значения вычисление идёт без блокировки."""
+        self.get(timeout=lambda value: 0)
+        cache.add(LOCK_KEY.format(key='test'), True)
+        with mock.patch('core.cache.time.sleep') as sleep:
+            self.assertEqual(self.get(timeout=lambda value: 0),
+                             'значение 2')
+        sleep.assert_not_called()
+        self.assertResult('bypass', 1)
+
+    def test_waiter_stops_on_uncached_value(self):
+        """Ожидающий запрос не ждёт, если значение оказалось некешируемым."""
+        cache.add(LOCK_KEY.format(key='test'), True)
+        with mock.patch(
+                'core.cache.time.sleep',
+                side_effect=lambda _: store('test', 'чужое', 0)) as sleep:
+            self.assertEqual(self.get(), 'значение 1')
+        self.assertEqual(sleep.call_count, 1)
+        self.assertResult('bypass', 1)
+
+    def test_new_version_recomputes(self):
+        """Запись старой версии пересчитывается."""
+        self.get(version=1)
+        self.assertEqual(self.get(version=2), 'значение 2')
+        self.assertResult('refresh', 1)
+
+    def test_stale_while_locked(self):
+        """Пока другой воркер пересчитывает, отдаётся старое значение."""
+        self.get(version=1)
+        cache.add(LOCK_KEY.format(key='test'), True)
+        self.assertEqual(self.get(version=2), 'значение 1')
+        self.assertEqual(self.calls, 1)
+        self.assertResult('stale', 1)
+
+    def test_wait_for_lock_holder(self):
+        """Без старого значения запрос ждёт результата другого воркера."""
+        cache.add(LOCK_KEY.format(key='test'), True)
+        with mock.patch('core.cache.time.sleep',
+                        side_effect=lambda _: store('test', 'чужое', 60)):
+            self.assertEqual(self.get(), 'чужое')
+        self.assertEqual(self.calls, 0)
+        self.assertResult('wait', 1)
+
+    @override_settings(CACHE_LOCK_TIMEOUT=0)
+    def test_lock_timeout(self):
+        """Если блокировка не освобождается, значение вычисляется сразу."""
+        cache.add(LOCK_KEY.format(key='test'), True)
+        self.assertEqual(self.get(), 'значение 1')
+
+    def test_early_recompute(self):
+        """Запись, долго вычислявшаяся, пересчитывается до истечения."""
+        cache.set('test', ('старое', None, time.time() + 10, 5))
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(self.get(), 'старое')
+        with mock.patch('core.cache.random.random', return_value=0.0):
+            self.assertEqual(self.get(), 'старое')
+        with mock.patch('core.cache.random.random', return_value=0.99):
+            self.assertEqual(self.get(), 'значение 1')
+
+    def test_single_flight(self):
+        """Одновременные промахи вычисляют значение один раз."""
+
+        def compute():
+            time.sleep(0.1)
+            return self.compute()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('test', compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['значение 1'] * 5)
+
+
+class StalePageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_missing_page_not_serialized(self):
+        """Страница 404 не ждёт блокировки, взятой другим запросом."""
+        url = reverse('posts:post_detail', args=(10_000,))
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 404)
+        with mock.patch('core.cache.cache.add', return_value=False):
+            with mock.patch('core.cache.time.sleep') as sleep:
+                self.assertEqual(client.get(url).status_code, 404)
+        sleep.assert_not_called()
+
+    def test_stale_page_while_rendering(self):
+        """Пока страница перерисовывается, аноним видит прежнюю копию."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Новый пост')
+        bump_content_version()
+        with mock.patch('core.cache.cache.add', return_value=False):
+            response = client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Новый пост')
+        self.assertContains(client.get(reverse('posts:index')), 'Новый пост')
+
+
+class SharedCacheCheckTest(TestCase):
+    def test_local_cache_warning(self):
+        """Проверка развёртывания предупреждает о кэше в памяти процесса."""
+        self.assertEqual([message.id for message in check_shared_cache(None)],
+                         ['core.W001'])
+        backend = 'django.core.cache.backends.memcached.MemcachedCache'
+        with override_settings(CACHES={'default': {'BACKEND': backend}}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,102 @@
+import gzip
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import compression
+from ..metrics import registry
+
+User = get_user_model()
+
+
+class CompressionTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.plain_client = Client()
+        self.gzip_client = Client(HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+    def choose(self, accept_encoding):
+        request = RequestFactory().get('/',
+                                       HTTP_ACCEPT_ENCODING=accept_encoding)
+        return compression.choose_encoding(request)
+
+    def test_choose_encoding(self):
+        """Кодировка выбирается по Accept-Encoding с учётом q."""
+        self.assertEqual(self.choose('gzip'), 'gzip')
+        self.assertEqual(self.choose('gzip;q=0, identity'), None)
+        self.assertEqual(self.choose(''), None)
+        self.assertEqual(self.choose('*;q=0.5, gzip;q=0'),
+                         'br' if compression.brotli else None)
+
+    @skipIf(compression.brotli is None, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        """При равном q выбирается brotli, при большем q у gzip — gzip."""
+        self.assertEqual(self.choose('gzip, br'), 'br')
+        self.assertEqual(self.choose('gzip, br;q=0.5'), 'gzip')
+
+    def test_cached_page_compressed_once(self):
+        """Сжатая копия страницы кэшируется и не сжимается повторно."""
+        url = reverse('posts:index')
+        plain = self.plain_client.get(url)
+        with mock.patch('core.middleware.compress',
+                        wraps=compression.compress) as compress:
+            first = self.gzip_client.get(url)
+            second = self.gzip_client.get(url)
+        self.assertEqual(compress.call_count, 1)
+        for response in (first, second):
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(gzip.decompress(response.content),
+                             plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    def test_uncached_page_compressed(self):
+        """Страницы вне кэша тоже отдаются сжатыми."""
+        self.gzip_client.force_login(self.user)
+        response = self.gzip_client.get(reverse('posts:index'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Первый пост', gzip.decompress(
+            response.content).decode())
+
+    def test_streaming_compressed_incrementally(self):
+        """Потоковый ответ сжимается по частям."""
+        url = reverse('posts:sitemap_page', args=(1,))
+        response = self.gzip_client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn(
+            reverse('posts:post_detail', args=(self.post.pk,)).encode(),
+            content)
+
+    def test_compression_metrics(self):
+        """Время сжатия, сэкономленное время и объёмы попадают в метрики."""
+        url = reverse('posts:index')
+        self.gzip_client.get(url)
+        self.gzip_client.get(url)
+        metrics = self.plain_client.get(reverse('metrics')).content.decode()
+        for name in ('yatube_compression_cpu_seconds_total',
+                     'yatube_compression_saved_cpu_seconds_total',
+                     'yatube_compression_input_bytes_total',
+                     'yatube_compression_output_bytes_total'):
+            with self.subTest(name=name):
+                self.assertIn(f'{name}{{encoding="gzip"}}', metrics)
+        self.assertIn(
+            'yatube_cache_requests_total{cache="page_variant",result="hit"} 1',
+            metrics)
@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..hashers import hashing_pool
+from ..metrics import registry
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHasherTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        hashing_pool.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        registry.reset()
+
+    def test_compatible_with_django(self):
+        """Хеш совпадает с хешем стандартного хешера Django."""
+        self.assertEqual(get_hasher().encode('пароль', 'salt'),
+                         PBKDF2PasswordHasher().encode('пароль', 'salt', 1000))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1)
+    def test_hashing_in_pool(self):
+        """Пароль хешируется в пуле процессов."""
+        user = User.objects.create_user(username='auth', password='пароль')
+        self.assertTrue(user.check_password('пароль'))
+        self.assertFalse(user.check_password('другой'))
+        self.assertIsNotNone(hashing_pool.executor)
+        metrics = Client().get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_password_hash_duration_seconds_count'
+                      '{worker="pool"} 3', metrics)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0)
+    def test_rehash_on_login(self):
+        """После смены числа итераций пароль перехешируется при входе."""
+        user = User.objects.create_user(username='auth', password='пароль')
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = Client().post(reverse('users:login'), {
+                'username': 'auth', 'password': 'пароль'})
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1)
+    def test_benchmark_command(self):
+        """Бенчмарк показывает число входов в секунду на ядро."""
+        out = StringIO()
+        call_command('benchmark_hashing', count=2, stdout=out)
+        self.assertIn('итераций 1000', out.getvalue())
+        self.assertIn('Пул из 1 процессов', out.getvalue())
@@ -0,0 +1,86 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..memory import diff_snapshots, snapshots, start_tracing, stop_tracing
+
+User = get_user_model()
+
+
+class MemoryDiagnosticsTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}') for i in range(20))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(stop_tracing)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_page_for_staff_only(self):
+        """Страница диагностики памяти доступна только персоналу."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('memory'))
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(reverse('memory'))
+        self.assertTemplateUsed(response, 'core/memory.html')
+
+    def test_diff_attributes_growth(self):
+        """Разница снимков указывает место в коде и модели."""
+        before = snapshots.take('before')
+        leaked = Post.objects.all()
+        len(leaked)
+        after = snapshots.take('after')
+        diff = diff_snapshots(before, after)
+        self.assertGreater(diff['growth'], 0)
+        instances = {item['model']: item['count_diff']
+                     for item in diff['instances']}
+        self.assertEqual(instances['posts.Post'], len(leaked))
+        self.assertEqual(instances['QuerySet[posts.Post]'], 1)
+        self.assertTrue(any('core/tests/test_memory.py' in item['location']
+                            for item in diff['locations']))
+
+    def test_snapshots_compared_on_page(self):
+        """Снимки делаются и сравниваются со страницы."""
+        url = reverse('memory')
+        for label in ('first', 'second'):
+            self.staff_client.post(url, {'action': 'snapshot',
+                                         'label': label})
+        self.assertEqual(snapshots.labels(), ['first', 'second'])
+        response = self.staff_client.get(url, {'from': 'first',
+                                               'to': 'second'})
+        self.assertEqual(response.context['diff']['from'], 'first')
+        self.staff_client.post(url, {'action': 'stop'})
+        self.assertEqual(snapshots.labels(), [])
+
+    @override_settings(MEMORY_PEAK_THRESHOLD=0)
+    def test_request_peak_logged(self):
+        """Пиковое потребление памяти запросом попадает в журнал."""
+        start_tracing()
+        with self.assertLogs('yatube.memory', 'WARNING') as logs:
+            Client().get(reverse('posts:index'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'posts:index')
+        self.assertGreater(entry['peak'], 0)
+
+    def test_memory_replay_command(self):
+        """Команда прогоняет запросы и выводит прирост памяти."""
+        out = StringIO()
+        call_command('memory_replay', url=[reverse('posts:index')],
+                     rounds=2, stdout=out)
+        self.assertIn('Запросов:', out.getvalue())
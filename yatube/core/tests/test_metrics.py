@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..metrics import registry
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.guest_client = Client()
+
+    def get_metrics(self):
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_request_metrics(self):
+        """Время ответа, запросы к базе, кэш и шаблоны попадают в метрики."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        metrics = self.get_metrics()
+        expected = (
+            'yatube_view_duration_seconds_count{view="posts:index"} 2',
+            'yatube_db_query_duration_seconds_count{view="posts:index"}',
+            'yatube_db_queries_per_request_count{view="posts:index"} 2',
+            'yatube_cache_requests_total{cache="page",result="hit"} 1',
+            'yatube_cache_requests_total{cache="page",result="miss"} 1',
+            'yatube_template_render_duration_seconds_count'
+            '{template="posts/index.html"} 1',
+            '# TYPE yatube_thumbnail_duration_seconds histogram',
+        )
+        for line in expected:
+            with self.subTest(line=line):
+                self.assertIn(line, metrics)
+
+    def test_unknown_urls_share_label(self):
+        """Несуществующие адреса не плодят отдельные ряды метрик."""
+        self.guest_client.get('/nonexist-page/')
+        self.guest_client.get('/another-missing-page/')
+        self.assertIn(
+            'yatube_view_duration_seconds_count{view="unresolved"} 2',
+            self.get_metrics())
+
+    def test_metrics_summed_across_processes(self):
+        """Метрики других процессов суммируются с текущим."""
+        metrics_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, metrics_dir, ignore_errors=True)
+        with open(os.path.join(metrics_dir, f'{os.getppid()}.json'),
+                  'w') as dump:
+            json.dump({
+                'yatube_cache_requests_total': [[['object', 'hit'], 5]],
+                'yatube_view_duration_seconds': [
+                    [['posts:index'], [1] + [0] * 12 + [0.001]],
+                ],
+            }, dump)
+        self.guest_client.get(reverse('posts:index'))
+        with override_settings(METRICS_DIR=metrics_dir):
+            metrics = self.get_metrics()
+            self.assertTrue(
+                os.path.exists(os.path.join(metrics_dir,
+                                            f'{os.getpid()}.json')))
+        self.assertIn(
+            'yatube_cache_requests_total{cache="object",result="hit"} 5',
+            metrics)
+        self.assertIn(
+            'yatube_view_duration_seconds_count{view="posts:index"} 2',
+            metrics)
+
+    def test_metrics_are_internal(self):
+        """Метрики недоступны с внешних адресов."""
+        response = self.guest_client.get(reverse('metrics'),
+                                         REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    def test_counters_kept_after_worker_exits(self):
+        """Счётчики завершившегося процесса не пропадают из суммы."""
+        metrics_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, metrics_dir, ignore_errors=True)
+        worker = subprocess.Popen(
+            [sys.executable, '-c', 'import time; time.sleep(60)'])
+        self.addCleanup(worker.kill)
+        path = os.path.join(metrics_dir, f'{worker.pid}.json')
+        with open(path, 'w') as dump:
+            json.dump({
+                'yatube_cache_requests_total': [[['object', 'hit'], 5]],
+                'yatube_view_duration_seconds': [
+                    [['posts:index'], [1] + [0] * 12 + [0.001]],
+                ],
+            }, dump)
+        expected = (
+            'yatube_cache_requests_total{cache="object",result="hit"} 5',
+            'yatube_view_duration_seconds_count{view="posts:index"} 1',
+        )
+        with override_settings(METRICS_DIR=metrics_dir):
+            before = self.get_metrics()
+            worker.kill()
+            worker.wait()
+            after = self.get_metrics()
+            again = self.get_metrics()
+        self.assertFalse(os.path.exists(path))
+        for line in expected:
+            with self.subTest(line=line):
+                self.assertIn(line, before)
+                self.assertIn(line, after)
+                self.assertIn(line, again)
+
+    def test_forwarded_requests_are_not_local(self):
+        """Запрос через обратный прокси не считается локальным."""
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_X_FORWARDED_FOR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        """С заданным токеном метрики отдаются только по нему."""
+        url = reverse('metrics')
+        self.assertEqual(self.guest_client.get(url).status_code, 403)
+        response = self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer other-token')
+        self.assertEqual(response.status_code, 403)
+        response = self.guest_client.get(
+            url, REMOTE_ADDR='10.0.0.1',
+            HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
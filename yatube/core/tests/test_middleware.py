@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный анонимный запрос не обращается к базе и шаблонам."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('about:author'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertTemplateNotUsed(second, 'base.html')
+                self.assertEqual(first.content, second.content)
+
+    def test_cache_invalidated_on_post_write(self):
+        """Новый пост сразу виден анонимным посетителям."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Второй пост')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Второй пост')
+
+    def test_comment_invalidates_only_its_post(self):
+        """Комментарий обновляет страницу своего поста, остальные страницы
+        остаются в кэше."""
+        other = Post.objects.create(author=self.user, text='Другой пост')
+        urls = {
+            reverse('posts:index'): False,
+            reverse('posts:post_detail', args=(other.pk,)): False,
+            reverse('posts:post_detail', args=(self.post.pk,)): True,
+        }
+        for url in urls:
+            self.guest_client.get(url)
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Новый комментарий')
+        for url, changed in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual('Новый комментарий'
+                                 in response.content.decode(), changed)
+                self.assertEqual(response.templates != [], changed)
+
+    def test_authenticated_pages_are_not_cached(self):
+        """Страницы для авторизованных пользователей не кэшируются."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Новая запись')
+
+    def test_login_page_is_not_cached(self):
+        """Страницы входа и регистрации не кэшируются."""
+        url = reverse('login')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertTemplateUsed(response, 'users/login.html')
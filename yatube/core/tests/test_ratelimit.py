@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from ..metrics import registry
+
+User = get_user_model()
+
+
+@override_settings(RATE_LIMITS={
+    'write': {'user': '2/m', 'ip': '3/m'},
+    'auth': {'ip': '2/m'},
+})
+class RateLimitTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.comment_url = reverse('posts:add_comment', args=(self.post.pk,))
+
+    def comment(self, client):
+        return client.post(self.comment_url, {'text': 'Комментарий'})
+
+    def test_throttled_before_orm(self):
+        """Лишний запрос отклоняется с 429, загрузив только пользователя."""
+        for _ in range(2):
+            self.assertEqual(self.comment(self.authorized_client).status_code,
+                             302)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.comment(self.authorized_client)
+        self.assertEqual(
+            [query['sql'].split('FROM')[1].split()[0] for query in queries],
+            ['"django_session"', '"auth_user"'])
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.for_post(self.post.pk).count(), 2)
+
+    def test_user_and_ip_buckets(self):
+        """У каждого пользователя свой лимит, у адреса — общий."""
+        other_client = Client()
+        other_client.force_login(self.other)
+        statuses = [self.comment(client).status_code for client in (
+            self.authorized_client, self.authorized_client, other_client,
+            other_client)]
+        self.assertEqual(statuses, [302, 302, 302, 429])
+
+    def test_new_session_keeps_bucket(self):
+        """Новая сессия не сбрасывает лимит пользователя."""
+        for _ in range(2):
+            self.comment(self.authorized_client)
+        client = Client(REMOTE_ADDR='10.0.0.2')
+        client.force_login(self.user)
+        self.assertEqual(self.comment(client).status_code, 429)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_client_ip_behind_proxy(self):
+        """За прокси адрес клиента берётся из заголовка прокси."""
+        url = reverse('users:login')
+        statuses = [
+            Client().post(url, HTTP_X_FORWARDED_FOR=f'1.1.1.1, {address}',
+                          data={'username': 'auth', 'password': 'wrong'})
+            .status_code
+            for address in ('10.0.0.1', '10.0.0.1', '10.0.0.2', '10.0.0.1')
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_contrib_auth_views_limited(self):
+        """Сброс пароля и вход в админку тоже ограничены."""
+        for url in ('/auth/password_reset/', reverse('admin:login')):
+            with self.subTest(url=url):
+                cache.clear()
+                client = Client()
+                statuses = [client.post(url, {'email': 'a@example.com'})
+                            .status_code for _ in range(3)]
+                self.assertEqual(statuses[-1], 429)
+
+    def test_bucket_refills(self):
+        """Со временем лимит восстанавливается."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            for _ in range(3):
+                self.comment(self.authorized_client)
+        with mock.patch('core.ratelimit.time.time', return_value=1030.0):
+            self.assertEqual(self.comment(self.authorized_client).status_code,
+                             302)
+
+    def test_reads_are_not_limited(self):
+        """Открытие формы не расходует лимит."""
+        for _ in range(3):
+            response = self.authorized_client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_login_throttled_with_metrics(self):
+        """Попытки входа ограничиваются и учитываются в метриках."""
+        client = Client()
+        statuses = [
+            client.post(reverse('users:login'),
+                        {'username': 'auth', 'password': 'wrong'}).status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        metrics = client.get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_throttled_requests_total{scope="auth",'
+                      'view="users:login"} 1', metrics)
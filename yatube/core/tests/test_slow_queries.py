@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..slow_queries import get_fingerprint, normalize_sql, slow_query_log
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0)
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Первый пост')
+
+    def setUp(self):
+        cache.clear()
+        slow_query_log.clear()
+        self.guest_client = Client()
+
+    def get_entries(self, url):
+        cache.clear()
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.guest_client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_fingerprint_ignores_literals(self):
+        """Запросы, отличающиеся только значениями, имеют один отпечаток."""
+        first = normalize_sql(
+            "SELECT * FROM posts_post WHERE id IN (1, 2, 3) AND text = 'a'")
+        second = normalize_sql(
+            "SELECT *  FROM posts_post WHERE id IN (%s, %s) AND text = 'b b'")
+        self.assertEqual(first, second)
+        self.assertEqual(get_fingerprint(first), get_fingerprint(second))
+
+    def test_slow_queries_logged_with_plan(self):
+        """В журнал попадают представление, место вызова и план запроса."""
+        entries = self.get_entries(reverse('posts:index'))
+        self.assertTrue(entries)
+        for entry in entries:
+            with self.subTest(sql=entry['sql']):
+                self.assertEqual(entry['view'], 'posts:index')
+                self.assertTrue(entry['location'].startswith('posts/'))
+                self.assertTrue(entry['plan'])
+
+    def test_repeated_queries_not_explained_again(self):
+        """Повторный запрос пишется без текста и плана."""
+        first = self.get_entries(reverse('posts:index'))
+        second = self.get_entries(reverse('posts:index'))
+        self.assertEqual([entry['fingerprint'] for entry in first],
+                         [entry['fingerprint'] for entry in second])
+        for entry in second:
+            with self.subTest(fingerprint=entry['fingerprint']):
+                self.assertNotIn('sql', entry)
+                self.assertNotIn('plan', entry)
+
+    def test_summary_command(self):
+        """Команда сводит журнал по отпечаткам запросов."""
+        log_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        log_path = os.path.join(log_dir, 'slow.log')
+        entries = (
+            {'fingerprint': 'aaa', 'duration': 0.5, 'view': 'posts:index',
+             'location': 'posts/views.py:1 in index', 'sql': 'SELECT 1',
+             'plan': ['SCAN posts_post']},
+            {'fingerprint': 'aaa', 'duration': 1.5, 'view': 'posts:index',
+             'location': 'posts/views.py:1 in index'},
+            {'fingerprint': 'bbb', 'duration': 0.2, 'view': 'other',
+             'location': None, 'sql': 'SELECT 2'},
+        )
+        with open(log_path, 'w') as log_file:
+            for entry in entries[1:]:
+                log_file.write(json.dumps(entry) + '\n')
+        with open(log_path + '.1', 'w') as log_file:
+            log_file.write(json.dumps(entries[0]) + '\n')
+        out = StringIO()
+        call_command('slow_queries', log=log_path, stdout=out)
+        summary = out.getvalue()
+        self.assertIn('aaa: 2 раз, всего 2000 мс, макс. 1500 мс', summary)
+        self.assertIn('план: SCAN posts_post', summary)
+        self.assertLess(summary.index('aaa'), summary.index('bbb'))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..startup import run_startup_probe
+
+HEAVY_MODULES = ('PIL',)
+
+
+class ColdStartTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = run_startup_probe('/about/author/')
+
+    def test_cold_start_fits_budget(self):
+        """Запуск воркера и первый запрос укладываются в бюджет времени."""
+        self.assertEqual(self.report['status'], '200 OK')
+        self.assertLess(
+            self.report['setup'] + self.report['first_request'],
+            settings.STARTUP_TIME_BUDGET,
+        )
+
+    def test_heavy_modules_are_not_imported_on_start(self):
+        """Обработка изображений не загружается при старте воркера."""
+        for phase, imports in self.report['imports'].items():
+            names = {name.split('.')[0] for name, _, _ in imports}
+            for module in HEAVY_MODULES:
+                with self.subTest(phase=phase, module=module):
+                    self.assertNotIn(module, names)
@@ -1,4 +1,14 @@
-from django.shortcuts import render
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics as app_metrics
+from .memory import diff_snapshots, snapshots, stop_tracing
 
 
 def page_not_found(request, exception):
@@ -15,3 +25,52 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def is_metrics_client(request):
+    """Whether the request may scrape metrics.
+
+    With ``METRICS_TOKEN`` set it must carry the token as a bearer token.
+    Without one only local clients may, and a request forwarded by a
+    reverse proxy is never trusted as local.
+    """
+    if settings.METRICS_TOKEN:
+        return constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {settings.METRICS_TOKEN}')
+    return (not settings.TRUSTED_PROXY_COUNT
+            and settings.CLIENT_IP_HEADER not in request.META
+            and request.META.get('REMOTE_ADDR')
+            in settings.METRICS_ALLOWED_IPS)
+
+
+def metrics(request):
+    if not is_metrics_client(request):
+        raise PermissionDenied
+    app_metrics.registry.dump()
+    return HttpResponse(app_metrics.registry.render(),
+                        content_type=app_metrics.CONTENT_TYPE)
+
+
+@staff_member_required
+def memory(request):
+    """Take ``tracemalloc`` snapshots of this worker and compare them."""
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        if action == 'snapshot':
+            snapshots.take(request.POST.get('label', '').strip())
+        elif action == 'stop':
+            stop_tracing()
+        return redirect('memory')
+    labels = snapshots.labels()
+    old = snapshots.get(request.GET.get('from'))
+    new = snapshots.get(request.GET.get('to'))
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return render(request, 'core/memory.html', {
+        'tracing': tracing,
+        'current': current,
+        'peak': peak,
+        'labels': labels,
+        'diff': diff_snapshots(old, new) if old and new else None,
+    })
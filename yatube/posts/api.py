@@ -0,0 +1,221 @@
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import (ArchivedComment, ArchivedPost, Change, Comment, Group,
+                     Post, User, image_storage)
+from .sync import COMMENTS, GROUPS, POSTS, get_change_logs
+
+
+class ApiError(Exception):
+    pass
+
+
+def image_url(name):
+    return image_storage.url(name) if name else None
+
+
+def get_querysets(model):
+    if model is Comment:
+        return Comment.objects.in_shards()
+    return [model.objects.all()]
+
+
+class Resource:
+    """Serializes one model for the API from ``values_list`` rows.
+
+    ``fields`` maps API field names to ORM lookups. Ids missing from the
+    first model are looked up in the following ones, which is how
+    archived posts and comments stay reachable by id. Fields listed in
+    ``usernames`` hold user ids and are resolved with one extra query,
+    for models that cannot be joined to the users.
+    """
+
+    def __init__(self, models, fields, transforms=None, usernames=()):
+        self.models = models
+        self.fields = fields
+        self.transforms = transforms or {}
+        self.usernames = usernames
+
+    def get_fields(self, requested):
+        if not requested:
+            return list(self.fields)
+        names = requested.split(',')
+        unknown = set(names) - self.fields.keys()
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        return ['id', *(name for name in names if name != 'id')]
+
+    def fetch(self, ids, fields):
+        lookups = [self.fields[name] for name in fields]
+        transforms = [(name, self.transforms[name]) for name in fields
+                      if name in self.transforms]
+        objects = {}
+        missing = set(ids)
+        for model in self.models:
+            for queryset in get_querysets(model):
+                if not missing:
+                    break
+                rows = queryset.filter(pk__in=missing).order_by()
+                for row in rows.values_list(*lookups):
+                    item = dict(zip(fields, row))
+                    for name, transform in transforms:
+                        item[name] = transform(item[name])
+                    objects[item['id']] = item
+                missing -= objects.keys()
+        self.resolve_usernames(objects.values(), fields)
+        return [objects[pk] for pk in ids if pk in objects]
+
+    def resolve_usernames(self, items, fields):
+        names = [name for name in self.usernames if name in fields]
+        if not names or not items:
+            return
+        user_ids = {item[name] for item in items for name in names}
+        usernames = dict(User.objects.filter(pk__in=user_ids)
+                         .values_list('pk', 'username'))
+        for item in items:
+            for name in names:
+                item[name] = usernames.get(item[name])
+
+
+RESOURCES = {
+    POSTS: Resource(
+        (Post, ArchivedPost),
+        {
+            'id': 'id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'author': 'author__username',
+            'group': 'group_id',
+            'image': 'image',
+            'views': 'views',
+        },
+        {'image': image_url},
+    ),
+    COMMENTS: Resource(
+        (Comment, ArchivedComment),
+        {
+            'id': 'id',
+            'post': 'post_id',
+            'author': 'author_id',
+            'text': 'text',
+            'created': 'created',
+        },
+        usernames=('author',),
+    ),
+    GROUPS: Resource(
+        (Group,),
+        {
+            'id': 'id',
+            'title': 'title',
+            'slug': 'slug',
+            'description': 'description',
+        },
+    ),
+}
+
+
+def api_view(view):
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+    return wrapper
+
+
+def parse_int(value, name):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(f'Параметр {name} должен быть целым числом')
+    if number < 0:
+        raise ApiError(f'Параметр {name} не может быть отрицательным')
+    return number
+
+
+def parse_ids(value):
+    ids = list(dict.fromkeys(
+        parse_int(item, 'ids') for item in value.split(',') if item))
+    if not ids:
+        raise ApiError('Не переданы идентификаторы')
+    if len(ids) > settings.API_FETCH_LIMIT:
+        raise ApiError(
+            f'Можно запросить не больше {settings.API_FETCH_LIMIT} объектов')
+    return ids
+
+
+def parse_cursor(value):
+    """Positions in every change log, from a sync cursor.
+
+    The cursor lists them in the order of ``get_change_logs``. A plain
+    number, as issued before the comment shards had logs of their own, is
+    a position in the default log.
+    """
+    positions = [parse_int(part, 'since') for part in value.split('.')]
+    logs = get_change_logs()
+    positions += [0] * (len(logs) - len(positions))
+    return dict(zip(logs, positions))
+
+
+def format_cursor(positions):
+    return '.'.join(str(position) for position in positions.values())
+
+
+@api_view
+def sync(request):
+    """Objects changed and deleted after the ``since`` cursor.
+
+    An unchanged feed costs one range scan of the primary key of every
+    change log and answers with the same cursor and nothing else.
+    """
+    positions = parse_cursor(request.GET.get('since', '0'))
+    limit = settings.API_SYNC_LIMIT
+    changes = []
+    has_more = False
+    for alias, since in positions.items():
+        budget = limit - len(changes)
+        rows = list(
+            Change.objects.using(alias).filter(id__gt=since)
+            .values_list('id', 'resource', 'object_id', 'deleted')[:budget + 1]
+        )
+        if len(rows) > budget:
+            has_more = True
+            rows = rows[:budget]
+        if rows:
+            positions[alias] = rows[-1][0]
+        changes += rows
+    changed = defaultdict(dict)
+    deleted = defaultdict(list)
+    for _, resource, object_id, is_deleted in changes:
+        if is_deleted:
+            deleted[resource].append(object_id)
+        else:
+            changed[resource][object_id] = None
+    data = {
+        'cursor': format_cursor(positions),
+        'has_more': has_more,
+        'changed': {},
+        'deleted': dict(deleted),
+    }
+    for name, ids in changed.items():
+        resource = RESOURCES[name]
+        fields = resource.get_fields(request.GET.get(f'fields[{name}]'))
+        data['changed'][name] = resource.fetch(list(ids), fields)
+    return data
+
+
+@api_view
+def fetch(request, resource):
+    if resource not in RESOURCES:
+        raise Http404('Неизвестный ресурс')
+    ids = parse_ids(request.GET.get('ids', ''))
+    fields = RESOURCES[resource].get_fields(request.GET.get('fields'))
+    return {resource: RESOURCES[resource].fetch(ids, fields)}
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Post,
+                     TrendingPost)
+
+POST_FIELDS = ('id', 'text', 'text_html', 'excerpt', 'pub_date', 'author_id',
+               'group_id', 'image', 'views')
+COMMENT_FIELDS = ('id', 'text', 'created', 'post_id', 'author_id')
+DELETE_BATCH_SIZE = 500
+
+
+class ArchiveFallbackList:
+    """Hot posts followed by archived ones, sliceable by the Paginator.
+
+    Every archived post is older than every hot post, so the archive simply
+    continues the hot list and is only queried for the pages past its end.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        hot_count = self.hot_count()
+        if stop is not None and stop <= hot_count:
+            return list(self.hot[start:stop])
+        result = list(self.hot[start:hot_count]) if start < hot_count else []
+        archived_stop = None if stop is None else stop - hot_count
+        return result + list(
+            self.archived[max(start - hot_count, 0):archived_stop]
+        )
+
+
+def get_archive_cutoff(age_days):
+    return timezone.now() - timedelta(days=age_days)
+
+
+def archive_comments(comments):
+    """Copy ``comments`` into the archive and return the copied ids."""
+    rows = list(comments.values(*COMMENT_FIELDS))
+    ArchivedComment.objects.bulk_create(
+        (ArchivedComment(**row) for row in rows), ignore_conflicts=True)
+    return [row['id'] for row in rows]
+
+
+def delete_comments(comments, ids):
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        batch = comments.filter(pk__in=ids[start:start + DELETE_BATCH_SIZE])
+        batch._raw_delete(batch.db)
+
+
+def archive_batch(post_ids):
+    """Copy a batch of posts with their comments into the archive.
+
+    The comments are removed from their shards only after the archive is
+    committed, so a failure in between leaves a copy behind rather than
+    losing comments. Only copied comments are removed; ones added while
+    the batch was copied are archived afterwards, once their posts are
+    gone and no more can arrive.
+    """
+    shard_comments = Comment.objects.in_shards(post_ids)
+    copied = {}
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            (ArchivedPost(**row) for row in
+             Post.objects.filter(pk__in=post_ids).values(*POST_FIELDS)),
+            ignore_conflicts=True,
+        )
+        for comments in shard_comments:
+            copied[comments.db] = archive_comments(comments)
+        TrendingPost.objects.filter(post_id__in=post_ids).delete()
+        posts = Post.objects.filter(pk__in=post_ids)
+        posts._raw_delete(posts.db)
+    for comments in shard_comments:
+        ids = copied[comments.db]
+        while ids:
+            delete_comments(comments, ids)
+            ids = archive_comments(comments)
+
+
+def archive_posts(cutoff, batch_size):
+    """Move posts older than ``cutoff`` into the archive, oldest first.
+
+    Every batch is committed on its own and archived rows are removed from
+    the hot tables, so an interrupted run simply continues where it stopped.
+    """
+    while True:
+        post_ids = list(
+            Post.objects.filter(pub_date__lt=cutoff)
+            .order_by('pub_date', 'pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not post_ids:
+            return
+        archive_batch(post_ids)
+        yield len(post_ids)
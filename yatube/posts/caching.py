@@ -0,0 +1,159 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
+
+from core.cache import get_content_version, get_or_compute
+
+from .models import ArchivedPost, Follow, Group, Post
+
+FOLLOW_SET_KEY = 'posts:follow_set:{user_id}'
+FOLLOW_COUNT_KEY = 'posts:follow_count:{user_id}'
+GROUP_DIRECTORY_KEY = 'posts:group_directory'
+OBJECT_KEY = 'posts:object:{label}:{field}:{digest}'
+# The scope of a post's page, see ANON_PAGE_CACHE_SCOPES.
+POST_SCOPE = 'post:{post_id}'
+
+
+class ObjectCacheStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def record(self, label, outcome):
+        with self.lock:
+            self.counts[label, outcome] += 1
+
+    def as_dict(self):
+        with self.lock:
+            counts = dict(self.counts)
+        stats = {}
+        for label in {label for label, _ in counts}:
+            hits = counts.get((label, 'hit'), 0)
+            misses = counts.get((label, 'miss'), 0)
+            stats[label] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0,
+            }
+        return stats
+
+
+object_cache_stats = ObjectCacheStats()
+
+
+def get_object_key(model, field, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return OBJECT_KEY.format(label=model._meta.label_lower, field=field,
+                             digest=digest)
+
+
+def get_object_timeout(obj):
+    if obj is None:
+        return settings.OBJECT_CACHE_NEGATIVE_TIMEOUT
+    return settings.OBJECT_CACHE_TIMEOUT
+
+
+def get_cached_object_or_404(model, **lookup):
+    """Read-through cache for ``get_object_or_404`` by one unique field.
+
+    Missing objects are cached too, for a shorter time, so repeated hits on
+    a dead profile or group link do not reach the database either.
+    """
+    (field, value), = lookup.items()
+    label = model._meta.label_lower
+    loaded = False
+
+    def load():
+        nonlocal loaded
+        loaded = True
+        return model._default_manager.filter(**lookup).first()
+
+    obj = get_or_compute(get_object_key(model, field, value), load,
+                         get_object_timeout, name='object')
+    object_cache_stats.record(label, 'miss' if loaded else 'hit')
+    if obj is None:
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
+    return obj
+
+
+def invalidate_cached_object(model, field, value):
+    cache.delete(get_object_key(model, field, value))
+
+
+def get_following_ids(user):
+    return get_or_compute(
+        FOLLOW_SET_KEY.format(user_id=user.pk),
+        lambda: frozenset(
+            Follow.objects.filter(user=user).values_list('author_id',
+                                                         flat=True)
+        ),
+        settings.FOLLOW_SET_CACHE_TIMEOUT,
+        name='follow_set',
+    )
+
+
+def get_follow_posts_count(user, posts):
+    """How many posts a follow feed has, up to ``FOLLOW_FEED_COUNT_LIMIT``.
+
+    Counting the feed of a large follow set checks every post, so the
+    count is capped and kept for ``FOLLOW_FEED_COUNT_TIMEOUT``. The pager
+    stops at the cap, and new posts show up on the first pages at once.
+    """
+    return get_or_compute(
+        FOLLOW_COUNT_KEY.format(user_id=user.pk),
+        lambda: posts[:settings.FOLLOW_FEED_COUNT_LIMIT].count(),
+        settings.FOLLOW_FEED_COUNT_TIMEOUT,
+        name='follow_count',
+    )
+
+
+def invalidate_following_ids(user_id):
+    cache.delete_many([FOLLOW_SET_KEY.format(user_id=user_id),
+                       FOLLOW_COUNT_KEY.format(user_id=user_id)])
+
+
+def group_posts_subqueries(model):
+    posts = model.objects.filter(group=OuterRef('pk'))
+    count = Subquery(
+        posts.order_by().values('group').annotate(count=Count('pk'))
+        .values('count'),
+        output_field=IntegerField(),
+    )
+    latest = posts.order_by('-pub_date')
+    return (Coalesce(count, 0),
+            Subquery(latest.values('pub_date')[:1]),
+            Subquery(latest.values('excerpt')[:1]))
+
+
+def get_group_directory():
+    """Every group with its post count, last activity and latest excerpt.
+
+    Built with one query of correlated subqueries served by the
+    ``group, -pub_date`` indexes; archived posts count too and stand in
+    for the latest post of a group with no hot ones. Cached until the
+    next content change.
+    """
+    return get_or_compute(GROUP_DIRECTORY_KEY, load_group_directory,
+                          settings.GROUP_DIRECTORY_CACHE_TIMEOUT,
+                          version=get_content_version(),
+                          name='group_directory')
+
+
+def load_group_directory():
+    hot_count, hot_date, hot_excerpt = group_posts_subqueries(Post)
+    old_count, old_date, old_excerpt = group_posts_subqueries(ArchivedPost)
+    return list(
+        Group.objects.annotate(
+            posts_count=hot_count + old_count,
+            last_activity=Coalesce(hot_date, old_date),
+            latest_excerpt=Coalesce(hot_excerpt, old_excerpt),
+        ).order_by('title')
+        .values('title', 'slug', 'posts_count', 'last_activity',
+                'latest_excerpt')
+    )
@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """Per-worker buffer of post views, flushed in batched UPDATEs.
+
+    Readers never take SQLite's write lock: a view is a dict increment, and
+    the accumulated counts are written at most once per flush interval with
+    one UPDATE per distinct increment value. Views still buffered when a
+    worker is killed are lost, which is acceptable for a popularity signal.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.last_flush = time.monotonic()
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+
+    def add(self, post_id):
+        with self.lock:
+            self.counts[post_id] += 1
+
+    def should_flush(self):
+        return (
+            time.monotonic() - self.last_flush
+            >= settings.VIEW_COUNT_FLUSH_INTERVAL
+            or len(self.counts) >= settings.VIEW_COUNT_FLUSH_THRESHOLD
+        )
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.last_flush = time.monotonic()
+        if not counts:
+            return
+        by_increment = defaultdict(list)
+        for post_id, increment in counts.items():
+            by_increment[increment].append(post_id)
+        try:
+            with transaction.atomic():
+                for increment, post_ids in by_increment.items():
+                    Post.objects.filter(pk__in=post_ids).update(
+                        views=F('views') + increment)
+        except DatabaseError:
+            logger.exception('Не удалось сохранить счётчики просмотров')
+            with self.lock:
+                self.counts.update(counts)
+
+
+view_counter = ViewCounterBuffer()
@@ -0,0 +1,250 @@
+import hashlib
+from functools import wraps
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db.models import Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import escape
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from core.cache import get_content_version, get_or_compute, store
+
+from .caching import get_cached_object_or_404
+from .models import ArchivedPost, Group, Post, User
+
+FEED_KEY = 'posts:feed:{digest}'
+CACHED_HEADERS = ('Content-Type', 'Last-Modified', 'ETag')
+
+SITEMAP_HEAD = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/'
+                'sitemap/0.9">\n')
+SITEMAP_URL = '<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>\n'
+SITEMAP_TAIL = '</urlset>\n'
+SITEMAP_INDEX_HEAD = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                      '<sitemapindex xmlns="http://www.sitemaps.org/'
+                      'schemas/sitemap/0.9">\n')
+SITEMAP_INDEX_ENTRY = '<sitemap><loc>{loc}</loc></sitemap>\n'
+SITEMAP_INDEX_TAIL = '</sitemapindex>\n'
+
+
+def get_feed_digest(request):
+    return hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+
+
+def get_feed_etag(request, *args, **kwargs):
+    return f'{get_content_version()}-{get_feed_digest(request)}'
+
+
+def get_feed_timeout(cached):
+    return settings.FEED_CACHE_TIMEOUT if isinstance(cached, tuple) else 0
+
+
+def cached_feed(view):
+    """Cache a feed until the next content change and answer revalidation.
+
+    The ETag is derived from the content version, so a reader that already
+    has the current document gets a bodiless 304 without the view running.
+    A stale copy served while the feed is rendered again keeps the ETag it
+    was cached with. A streaming response is copied into the cache while
+    it is being sent, unless it grows past ``FEED_CACHE_MAX_SIZE``.
+    """
+
+    @condition(etag_func=get_feed_etag)
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = FEED_KEY.format(digest=get_feed_digest(request))
+        version = get_content_version()
+
+        def render():
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response['ETag'] = quote_etag(
+                f'{version}-{get_feed_digest(request)}')
+            headers = {header: response[header]
+                       for header in CACHED_HEADERS
+                       if response.has_header(header)}
+            if response.streaming:
+                response.streaming_content = tee_to_cache(
+                    response.streaming_content, key, headers, version)
+                return response
+            return response.content, headers
+
+        cached = get_or_compute(key, render, get_feed_timeout,
+                                version=version, name='feed')
+        if not isinstance(cached, tuple):
+            return cached
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    return wrapper
+
+
+def tee_to_cache(chunks, key, headers, version):
+    size = 0
+    collected = []
+    for chunk in chunks:
+        if collected is not None:
+            size += len(chunk)
+            if size > settings.FEED_CACHE_MAX_SIZE:
+                collected = None
+            else:
+                collected.append(chunk)
+        yield chunk
+    if collected is not None:
+        store(key, (b''.join(collected), headers),
+              settings.FEED_CACHE_TIMEOUT, version)
+
+
+class LatestPostsFeed(Feed):
+    title = 'Последние обновления на сайте'
+    description = 'Новые записи всех авторов'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.get_posts(obj).select_related('author').only(
+            'id', 'excerpt', 'pub_date', 'author__username',
+            'author__first_name', 'author__last_name',
+        )[:settings.FEED_ITEMS]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_cached_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Записи сообщества {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_cached_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Записи пользователя {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.title(obj)
+
+
+def get_sitemap_page_count():
+    """Pages of ``SITEMAP_PAGE_SIZE`` post ids, up to the last post.
+
+    Archived posts keep their ids, so a page lists at most that many URLs
+    across both tables.
+    """
+    last_pk = max(
+        model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        for model in (Post, ArchivedPost)
+    )
+    return max(1, -(-last_pk // settings.SITEMAP_PAGE_SIZE))
+
+
+@cached_feed
+def sitemap_index(request):
+    entries = (
+        SITEMAP_INDEX_ENTRY.format(loc=escape(request.build_absolute_uri(
+            reverse('posts:sitemap_page', args=(page,)))))
+        for page in range(1, get_sitemap_page_count() + 1)
+    )
+    return HttpResponse(
+        SITEMAP_INDEX_HEAD + ''.join(entries) + SITEMAP_INDEX_TAIL,
+        content_type='application/xml',
+    )
+
+
+def iter_sitemap(request, page):
+    yield SITEMAP_HEAD
+    first_pk = (page - 1) * settings.SITEMAP_PAGE_SIZE + 1
+    pk_range = (first_pk, first_pk + settings.SITEMAP_PAGE_SIZE - 1)
+    posts = chain(*(
+        model.objects.filter(pk__range=pk_range).order_by()
+        .values_list('pk', 'pub_date')
+        .iterator(chunk_size=settings.SITEMAP_CHUNK_SIZE)
+        for model in (Post, ArchivedPost)
+    ))
+    for pk, pub_date in posts:
+        yield SITEMAP_URL.format(
+            loc=escape(request.build_absolute_uri(
+                reverse('posts:post_detail', args=(pk,)))),
+            lastmod=pub_date.date().isoformat(),
+        )
+    yield SITEMAP_TAIL
+
+
+@cached_feed
+def sitemap(request, page):
+    if not 1 <= page <= get_sitemap_page_count():
+        raise Http404
+    return StreamingHttpResponse(iter_sitemap(request, page),
+                                 content_type='application/xml')
+
+
+latest_posts_rss = cached_feed(LatestPostsFeed())
+latest_posts_atom = cached_feed(LatestPostsAtomFeed())
+group_posts_rss = cached_feed(GroupPostsFeed())
+group_posts_atom = cached_feed(GroupPostsAtomFeed())
+author_posts_rss = cached_feed(AuthorPostsFeed())
+author_posts_atom = cached_feed(AuthorPostsAtomFeed())
@@ -2,12 +2,14 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 
 from .models import Post, Comment
+from .widgets import GroupSearchWidget
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        widgets = {'group': GroupSearchWidget}
         labels = {
             'text': _('Текст поста'),
             'group': _('Группа'),
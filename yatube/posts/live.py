@@ -0,0 +1,196 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_GET
+
+from core.cache import is_shared_cache
+from core.ratelimit import rate_limit
+
+from .models import Comment, Post
+
+LATEST_COMMENT_KEY = 'posts:latest_comment:{post_id}'
+
+
+class CommentHub:
+    """In-process fan-out of new comments to the open streams of a post.
+
+    Every stream owns a queue it blocks on; publishing renders a comment
+    once and hands the same event to every queue of the post.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.count = 0
+
+    def subscribe(self, post_id):
+        with self.lock:
+            if self.count >= settings.COMMENT_STREAM_MAX_SUBSCRIBERS:
+                return None
+            subscriber = queue.SimpleQueue()
+            self.subscribers[post_id].add(subscriber)
+            self.count += 1
+            return subscriber
+
+    def unsubscribe(self, post_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(post_id, set())
+            if subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            self.count -= 1
+            if not subscribers:
+                del self.subscribers[post_id]
+
+    def publish(self, post_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(post_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+
+comment_hub = CommentHub()
+
+
+def render_comment(comment):
+    return comment.pk, render_to_string('posts/includes/comment.html',
+                                        {'comment': comment})
+
+
+def publish_comment(comment):
+    cache.set(LATEST_COMMENT_KEY.format(post_id=comment.post_id), comment.pk,
+              settings.COMMENT_STREAM_TIMEOUT)
+    comment_hub.publish(comment.post_id, render_comment(comment))
+
+
+def release_connections():
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def get_missed_events(post_id, last_id):
+    comments = (
+        Comment.objects.for_post(post_id).filter(pk__gt=last_id)
+        .prefetch_related('author').order_by('pk')
+        [:settings.COMMENT_STREAM_REPLAY_LIMIT]
+    )
+    return [render_comment(comment) for comment in comments]
+
+
+def has_new_comments(post_id, last_id):
+    """Whether comments after ``last_id`` may exist, without the database.
+
+    The latest comment id is only trusted from a shared cache; a
+    process-local one does not see comments saved by other workers.
+    """
+    if not is_shared_cache():
+        return True
+    latest = cache.get(LATEST_COMMENT_KEY.format(post_id=post_id))
+    return latest is None or latest > last_id
+
+
+def format_event(comment_id, html):
+    data = json.dumps({'html': html}, ensure_ascii=False)
+    return f'id: {comment_id}\nevent: comment\ndata: {data}\n\n'
+
+
+def iter_comment_events(post_id, last_id):
+    """Server-sent events for the comments of a post after ``last_id``.
+
+    Comments saved by other processes are not published to this hub; the
+    gap is read from the database between keepalives whenever
+    ``has_new_comments`` allows for one. No database connection is held
+    while waiting.
+    """
+    subscriber = comment_hub.subscribe(post_id)
+    if subscriber is None:
+        return
+    deadline = time.monotonic() + settings.COMMENT_STREAM_TIMEOUT
+    try:
+        yield f'retry: {settings.COMMENT_STREAM_RETRY}\n\n'
+        events = get_missed_events(post_id, last_id)
+        release_connections()
+        while True:
+            for comment_id, html in events:
+                if comment_id > last_id:
+                    last_id = comment_id
+                    yield format_event(comment_id, html)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                events = [subscriber.get(timeout=min(
+                    remaining, settings.COMMENT_STREAM_KEEPALIVE))]
+            except queue.Empty:
+                events = []
+                if has_new_comments(post_id, last_id):
+                    events = get_missed_events(post_id, last_id)
+                    release_connections()
+                if not events:
+                    yield ': keepalive\n\n'
+    finally:
+        comment_hub.unsubscribe(post_id, subscriber)
+
+
+def parse_last_id(request):
+    value = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'after', '0')
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return 0
+
+
+@rate_limit('poll', methods=('GET',))
+@require_GET
+def comment_updates(request, post_id):
+    """Comments of a post after the ``after`` id, for short polling.
+
+    The post page polls this instead of holding a stream open. With a
+    shared cache a poll with nothing new does not reach the database.
+    """
+    last_id = parse_last_id(request)
+    events = []
+    if has_new_comments(post_id, last_id):
+        get_object_or_404(Post.objects.only('pk'), pk=post_id)
+        events = get_missed_events(post_id, last_id)
+    return JsonResponse({
+        'comments': [{'id': comment_id, 'html': html}
+                     for comment_id, html in events],
+        'interval': settings.COMMENT_POLL_INTERVAL,
+    })
+
+
+@rate_limit('stream', methods=('GET',))
+@require_GET
+def comment_stream(request, post_id):
+    """Stream new comments of a post as server-sent events.
+
+    Django 2.2 has no async views, so an open stream occupies a worker
+    thread for up to ``COMMENT_STREAM_TIMEOUT``. Pages therefore poll
+    ``comment_updates``; streams are for clients that opt in, capped per
+    process and rate-limited. After a timeout the client reconnects with
+    ``Last-Event-ID`` and misses nothing.
+    """
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    if comment_hub.count >= settings.COMMENT_STREAM_MAX_SUBSCRIBERS:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = settings.COMMENT_STREAM_RETRY // 1000
+        return response
+    response = StreamingHttpResponse(
+        iter_comment_events(post_id, parse_last_id(request)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.cache import bump_content_version
+from posts.archive import archive_posts, get_archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и комментарии к ним в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--age-days', type=int, default=settings.POST_ARCHIVE_AGE_DAYS,
+            help='Архивировать посты старше указанного числа дней',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.POST_ARCHIVE_BATCH_SIZE,
+            help='Количество постов, переносимых в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options['age_days'])
+        total = 0
+        for archived in archive_posts(cutoff, options['batch_size']):
+            total += archived
+            bump_content_version()
+            self.stdout.write(f'Перенесено в архив: {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, в архив перенесено постов: {total}'
+        ))
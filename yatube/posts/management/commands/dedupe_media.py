@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.cache import bump_content_version
+from posts.models import ArchivedPost, Post, image_storage
+from posts.storage import CONTENT_NAME_RE
+
+
+class Command(BaseCommand):
+    help = ('Переименовывает ранее загруженные картинки постов по хешу '
+            'содержимого и удаляет дубликаты')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.POST_ARCHIVE_BATCH_SIZE,
+            help='Количество файлов, обрабатываемых за один проход',
+        )
+
+    def get_legacy_names(self, model, skipped, batch_size):
+        return list(
+            model.objects.exclude(image='')
+            .exclude(image__regex=CONTENT_NAME_RE.pattern)
+            .exclude(image__in=skipped)
+            .order_by('image')
+            .values_list('image', flat=True)
+            .distinct()[:batch_size]
+        )
+
+    def migrate_image(self, name):
+        with image_storage.open(name) as legacy_file:
+            new_name = image_storage.save(name, File(legacy_file))
+        for model in (Post, ArchivedPost):
+            model.objects.filter(image=name).update(image=new_name)
+        default.kvstore.delete(ImageFile(name, image_storage))
+        image_storage.delete(name)
+        return new_name
+
+    def handle(self, *args, **options):
+        migrated = set()
+        skipped = set()
+        for model in (Post, ArchivedPost):
+            while True:
+                names = self.get_legacy_names(model, skipped,
+                                              options['batch_size'])
+                if not names:
+                    break
+                for name in names:
+                    if not image_storage.exists(name):
+                        self.stderr.write(f'Файл не найден: {name}')
+                        skipped.add(name)
+                        continue
+                    migrated.add(self.migrate_image(name))
+        bump_content_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов после переименования: {len(migrated)}, '
+            f'пропущено: {len(skipped)}'
+        ))
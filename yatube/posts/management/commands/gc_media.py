@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from sorl.thumbnail import default
+
+from posts.media import find_orphans, get_referenced_files, remove_orphan
+
+
+class Command(BaseCommand):
+    help = ('Находит и удаляет картинки и миниатюры, на которые больше '
+            'не ссылается ни один пост')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет удалено')
+        parser.add_argument('--quarantine', metavar='DIR',
+                            help='Переносить файлы в каталог вместо удаления')
+        parser.add_argument(
+            '--workers', type=int, default=settings.MEDIA_GC_WORKERS,
+            help='Количество потоков для обхода каталогов',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=settings.MEDIA_GC_RATE,
+            help='Не больше стольких удалений в секунду (0 — без ограничений)',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=settings.MEDIA_GC_MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд',
+        )
+
+    def handle(self, *args, **options):
+        referenced = get_referenced_files()
+        interval = 1 / options['rate'] if options['rate'] else 0
+        removed = reclaimed = 0
+        for name, size in find_orphans(referenced, options['workers'],
+                                       options['min_age']):
+            if not options['dry_run']:
+                started = time.monotonic()
+                if not remove_orphan(name, options['quarantine'],
+                                     options['min_age']):
+                    continue
+                time.sleep(max(0, interval - (time.monotonic() - started)))
+            if options['verbosity'] > 1 or options['dry_run']:
+                self.stdout.write(f'{name} ({filesizeformat(size)})')
+            removed += 1
+            reclaimed += size
+        if removed and not options['dry_run']:
+            default.kvstore.cleanup()
+        action = 'будет освобождено' if options['dry_run'] else 'освобождено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Ссылок на файлы: {len(referenced)}, лишних файлов: {removed}, '
+            f'{action} {filesizeformat(reclaimed)}'
+        ))
@@ -0,0 +1,77 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from core.memory import Snapshot, diff_snapshots, start_tracing
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет набор запросов в этом процессе и показывает, '
+            'на сколько и где выросла память')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', default=[],
+            help='Адрес для прогона; по умолчанию ленты, группы, посты '
+                 'и профили',
+        )
+        parser.add_argument('--rounds', type=int, default=10,
+                            help='Сколько раз прогнать весь набор')
+        parser.add_argument('--warmup', type=int, default=1,
+                            help='Сколько прогонов сделать до первого снимка')
+        parser.add_argument('--username',
+                            help='Выполнять запросы от имени пользователя')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Сколько мест в коде и моделей показать')
+
+    def get_urls(self):
+        urls = [reverse('posts:index'), reverse('posts:group_directory'),
+                reverse('posts:trending')]
+        for slug in Group.objects.values_list('slug', flat=True)[:5]:
+            urls.append(reverse('posts:group_list', args=(slug,)))
+        for post_id, username in Post.objects.values_list(
+                'pk', 'author__username')[:10]:
+            urls.append(reverse('posts:post_detail', args=(post_id,)))
+            urls.append(reverse('posts:profile', args=(username,)))
+        return list(dict.fromkeys(urls))
+
+    def replay(self, client, urls, rounds):
+        for _ in range(rounds):
+            for url in urls:
+                client.get(url)
+
+    def handle(self, *args, **options):
+        client = Client()
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден')
+            client.force_login(user)
+        urls = options['url'] or self.get_urls()
+        was_tracing = tracemalloc.is_tracing()
+        start_tracing()
+        try:
+            self.replay(client, urls, options['warmup'])
+            before = Snapshot('before')
+            self.replay(client, urls, options['rounds'])
+            after = Snapshot('after')
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        diff = diff_snapshots(before, after, options['limit'])
+        requests = len(urls) * options['rounds']
+        self.stdout.write(
+            f"Запросов: {requests}, прирост памяти: {diff['growth']} байт, "
+            f"на запрос: {diff['growth'] // max(requests, 1)} байт"
+        )
+        for item in diff['locations']:
+            self.stdout.write(f"{item['size_diff']:>10} "
+                              f"{item['count_diff']:>7}  {item['location']}")
+        for item in diff['instances']:
+            self.stdout.write(f"{item['count_diff']:>+10}  {item['model']}")
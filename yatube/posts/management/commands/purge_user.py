@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import User
+from posts.purge import purge_user
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователей вместе с постами, комментариями, '
+            'подписками и картинками порциями фиксированного размера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='+')
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Количество строк, удаляемых одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username__in=options['usernames'])
+        missing = set(options['usernames']) - {user.username for user in users}
+        if missing:
+            raise CommandError(
+                f'Пользователи не найдены: {", ".join(sorted(missing))}')
+        for user in users:
+            stats = purge_user(user, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{user.username}: удалено постов {stats['posts']}, "
+                f"комментариев {stats['comments']}, "
+                f"картинок {stats['images']}"
+            ))
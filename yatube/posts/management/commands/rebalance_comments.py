@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core.cache import bump_content_version
+from posts.models import Comment
+from posts.sharding import copy_rows, get_comment_shard
+
+
+def iter_misplaced(alias, batch_size):
+    """Yield the comments stored on ``alias`` that belong to another shard.
+
+    Comments are scanned in pk order ``batch_size`` at a time; moved rows
+    are always behind the scan, so moving them does not shift the batches.
+    """
+    comments = Comment.objects.using(alias).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(comments.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        misplaced = [comment for comment in batch
+                     if get_comment_shard(comment.post_id) != alias]
+        if misplaced:
+            yield misplaced
+
+
+def move_comments(alias, comments):
+    # Copies are idempotent, so a run interrupted between the copy and
+    # the delete is finished by the next one.
+    shards = defaultdict(list)
+    for comment in comments:
+        shards[get_comment_shard(comment.post_id)].append(comment)
+    for shard, shard_comments in shards.items():
+        copy_rows(Comment, shard_comments, shard)
+    Comment.objects.using(alias).filter(
+        pk__in=[comment.pk for comment in comments]
+    )._raw_delete(alias)
+
+
+class Command(BaseCommand):
+    help = 'Переносит комментарии в шарды, которым они принадлежат'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', action='append', default=[],
+            help='Дополнительная база, из которой забрать комментарии',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество комментариев, проверяемых за один запрос',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать комментарии, которые нужно перенести',
+        )
+
+    def handle(self, *args, **options):
+        aliases = dict.fromkeys(
+            (DEFAULT_DB_ALIAS, *settings.COMMENT_SHARDS, *options['source']))
+        total = 0
+        for alias in aliases:
+            for misplaced in iter_misplaced(alias, options['batch_size']):
+                total += len(misplaced)
+                if not options['dry_run']:
+                    move_comments(alias, misplaced)
+                self.stdout.write(f'{alias}: {total}')
+        if total and not options['dry_run']:
+            bump_content_version()
+        verb = 'нужно перенести' if options['dry_run'] else 'перенесено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, комментариев {verb}: {total}'
+        ))
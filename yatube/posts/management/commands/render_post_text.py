@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.cache import bump_content_version
+from posts.models import ArchivedPost, Post, render_text
+
+
+class Command(BaseCommand):
+    help = 'Заполняет HTML-версию и анонс постов, сохранённых до их появления'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.POST_ARCHIVE_BATCH_SIZE,
+            help='Количество постов, обновляемых одним запросом',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все посты, а не только незаполненные',
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            posts = model.objects.only('pk', 'text').order_by('pk')
+            if not options['all']:
+                posts = posts.filter(text_html='')
+            total = 0
+            last_pk = 0
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk)[:options['batch_size']])
+                if not batch:
+                    break
+                for post in batch:
+                    post.text_html, post.excerpt = render_text(post.text)
+                model.objects.bulk_update(batch, ('text_html', 'excerpt'))
+                total += len(batch)
+                last_pk = batch[-1].pk
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {total}')
+        bump_content_version()
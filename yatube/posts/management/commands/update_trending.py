@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.cache import bump_content_version
+from posts.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает ленту популярных постов; запускается по '
+            'расписанию, например из cron')
+
+    def handle(self, *args, **options):
+        count = update_trending()
+        bump_content_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярных постов: {count}'))
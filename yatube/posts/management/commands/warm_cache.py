@@ -0,0 +1,113 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.cache import is_shared_cache
+from posts.models import Group, Post, User
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def pages_count(posts_count, max_pages):
+    return max(1, min(max_pages, math.ceil(posts_count / settings.POST_COUNT)))
+
+
+def paged_urls(url, posts_count, max_pages):
+    """The pages of a feed as visitors request them: page 1 is bare."""
+    return [url] + [
+        f'{url}?page={page}'
+        for page in range(2, pages_count(posts_count, max_pages) + 1)
+    ]
+
+
+def fetch(url, host, secure):
+    # Cached pages are keyed by the absolute URL, so the pages are
+    # requested for the host and scheme visitors use, and with the
+    # encodings browsers accept to cache the compressed variants too.
+    try:
+        response = Client().get(url, HTTP_HOST=host, secure=secure,
+                                HTTP_ACCEPT_ENCODING=ACCEPT_ENCODING)
+        return url, response.status_code
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кэши: рендерит первые страницы ленты, групп и '
+            'профилей самых активных авторов вместе с их миниатюрами')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=settings.WARM_CACHE_PAGES,
+            help='Сколько первых страниц каждой ленты рендерить',
+        )
+        parser.add_argument(
+            '--authors', type=int, default=settings.WARM_CACHE_AUTHORS,
+            help='Сколько профилей самых активных авторов рендерить',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.WARM_CACHE_WORKERS,
+            help='Количество параллельных потоков',
+        )
+        parser.add_argument(
+            '--host', default=settings.WARM_CACHE_HOST,
+            help='Домен, по которому сайт открывают посетители',
+        )
+        parser.add_argument(
+            '--scheme', choices=('http', 'https'),
+            default=settings.WARM_CACHE_SCHEME,
+            help='Протокол, по которому сайт открывают посетители',
+        )
+
+    def get_urls(self, max_pages, authors_limit):
+        urls = paged_urls(reverse('posts:index'), Post.objects.count(),
+                          max_pages)
+        for group in Group.objects.annotate(posts_count=Count('posts')):
+            urls += paged_urls(
+                reverse('posts:group_list', kwargs={'slug': group.slug}),
+                group.posts_count, max_pages,
+            )
+        authors = (
+            User.objects.annotate(posts_count=Count('posts'))
+            .filter(posts_count__gt=0)
+            .order_by('-posts_count')[:authors_limit]
+        )
+        for author in authors:
+            urls += paged_urls(
+                reverse('posts:profile',
+                        kwargs={'username': author.username}),
+                author.posts_count, max_pages,
+            )
+        return urls
+
+    def handle(self, *args, **options):
+        if not is_shared_cache():
+            self.stderr.write(self.style.WARNING(
+                'Кэш страниц локален для процесса и пропадёт вместе с '
+                'командой: прогреются только миниатюры'
+            ))
+        urls = self.get_urls(options['pages'], options['authors'])
+        start = time.monotonic()
+        failed = []
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = executor.map(
+                partial(fetch, host=options['host'],
+                        secure=options['scheme'] == 'https'),
+                urls)
+            for url, status_code in results:
+                if status_code != 200:
+                    failed.append(url)
+                    self.stderr.write(f'{url}: {status_code}')
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(urls) - len(failed)} из {len(urls)} '
+            f'за {elapsed:.1f} с'
+        ))
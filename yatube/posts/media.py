@@ -0,0 +1,129 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .models import ArchivedPost, Post, image_storage
+
+
+def get_media_dirs():
+    return (Post._meta.get_field('image').upload_to.strip('/'),
+            thumbnail_settings.THUMBNAIL_PREFIX.strip('/'))
+
+
+def get_referenced_files():
+    """Names of uploaded images still used by posts and their thumbnails."""
+    referenced = set()
+    images = chain(
+        Post.objects.exclude(image='').values_list('image', flat=True)
+        .iterator(),
+        ArchivedPost.objects.exclude(image='').values_list('image', flat=True)
+        .iterator(),
+    )
+    for name in images:
+        referenced.add(name)
+        thumbnail_keys = default.kvstore._get(
+            ImageFile(name, image_storage).key, identity='thumbnails')
+        for key in thumbnail_keys or ():
+            thumbnail = default.kvstore._get(key)
+            if thumbnail is not None:
+                referenced.add(thumbnail.name)
+    return referenced
+
+
+def count_image_references(name):
+    return (Post.objects.filter(image=name).count()
+            + ArchivedPost.objects.filter(image=name).count())
+
+
+def release_image(name):
+    """Delete an image with its thumbnails once no post refers to it.
+
+    The reference count is read from the indexed ``image`` columns instead
+    of a stored counter, so raw bulk deletes cannot leave it out of sync.
+    """
+    if not name or count_image_references(name):
+        return False
+    default.kvstore.delete(ImageFile(name, image_storage))
+    image_storage.delete(name)
+    return True
+
+
+def scan_files(dirpath, filenames, referenced, min_mtime):
+    orphans = []
+    for filename in filenames:
+        full_path = os.path.join(dirpath, filename)
+        name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(
+            os.sep, '/')
+        if name in referenced:
+            continue
+        stat = os.stat(full_path)
+        if stat.st_mtime < min_mtime:
+            orphans.append((name, stat.st_size))
+    return orphans
+
+
+def scan_dir(path, referenced, min_mtime):
+    return [
+        orphan
+        for dirpath, _, filenames in os.walk(path)
+        for orphan in scan_files(dirpath, filenames, referenced, min_mtime)
+    ]
+
+
+def find_orphans(referenced, workers, min_age):
+    """Scan the media directories in parallel for unreferenced files.
+
+    Every subdirectory is walked by its own task, which is what makes the
+    scan fast on sorl's two-level hashed cache tree. Files younger than
+    ``min_age`` seconds are skipped as they may belong to an unsaved post.
+    """
+    min_mtime = time.time() - min_age
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = []
+        for media_dir in get_media_dirs():
+            root = os.path.join(settings.MEDIA_ROOT, media_dir)
+            if not os.path.isdir(root):
+                continue
+            filenames = []
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        tasks.append(executor.submit(
+                            scan_dir, entry.path, referenced, min_mtime))
+                    else:
+                        filenames.append(entry.name)
+            tasks.append(executor.submit(
+                scan_files, root, filenames, referenced, min_mtime))
+        for task in tasks:
+            yield from task.result()
+
+
+def remove_orphan(name, quarantine_dir=None, min_age=0):
+    """Delete or quarantine a file found by ``find_orphans``.
+
+    The scan may take long, so a post can start using the file meanwhile:
+    an upload of the same bytes touches it, and its post is counted again
+    here. A file that became young or referenced is kept.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    try:
+        if os.stat(path).st_mtime >= time.time() - min_age:
+            return False
+    except FileNotFoundError:
+        return False
+    if count_image_references(name):
+        return False
+    if quarantine_dir:
+        target = os.path.join(quarantine_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+    else:
+        os.remove(path)
+    return True
@@ -0,0 +1,25 @@
+from django.urls import Resolver404, resolve
+
+from .counters import view_counter
+
+POST_DETAIL_VIEW = 'posts:post_detail'
+
+
+class PostViewCountMiddleware:
+    """Count post_detail hits, including those served from the page cache."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method == 'GET' and response.status_code == 200:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return response
+            if match.view_name == POST_DETAIL_VIEW:
+                view_counter.add(match.kwargs['post_id'])
+        if view_counter.should_flush():
+            view_counter.flush()
+        return response
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.28 on 2026-10-19 08:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='пост')),
+                ('score', models.FloatField(db_index=True, verbose_name='рейтинг')),
+            ],
+            options={
+                'verbose_name': 'популярный пост',
+                'verbose_name_plural': 'популярные посты',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='просмотры'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='просмотры'),
+        ),
+    ]
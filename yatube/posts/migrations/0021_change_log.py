@@ -0,0 +1,49 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:09
+
+from django.db import migrations, models
+
+SEED_BATCH_SIZE = 1000
+RESOURCES = (('groups', 'Group'), ('posts', 'Post'), ('comments', 'Comment'))
+
+
+def seed_changes(apps, schema_editor):
+    Change = apps.get_model('posts', 'Change')
+    for resource, model_name in RESOURCES:
+        model = apps.get_model('posts', model_name)
+        ids = model.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for object_id in ids.iterator():
+            batch.append(Change(resource=resource, object_id=object_id))
+            if len(batch) == SEED_BATCH_SIZE:
+                Change.objects.bulk_create(batch)
+                batch = []
+        Change.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=20, verbose_name='ресурс')),
+                ('object_id', models.IntegerField(verbose_name='идентификатор объекта')),
+                ('deleted', models.BooleanField(default=False, verbose_name='удалён')),
+            ],
+            options={
+                'verbose_name': 'изменение',
+                'verbose_name_plural': 'изменения',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['resource', 'object_id'], name='posts_change_object_idx'),
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
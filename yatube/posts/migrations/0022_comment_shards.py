@@ -0,0 +1,57 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:15
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_comment_sequence(apps, schema_editor):
+    """Start the shared comment ids after every existing comment id."""
+    connection = schema_editor.connection
+    CommentSequence = apps.get_model('posts', 'CommentSequence')
+    last_id = max(
+        apps.get_model('posts', model_name).objects.using(connection.alias)
+        .aggregate(last_id=models.Max('id'))['last_id'] or 0
+        for model_name in ('Comment', 'ArchivedComment')
+    )
+    if not last_id:
+        return
+    CommentSequence.objects.using(connection.alias).create(id=last_id)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(),
+                                                     [CommentSequence]):
+            cursor.execute(sql)
+    CommentSequence.objects.using(connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'счётчик комментариев',
+                'verbose_name_plural': 'счётчики комментариев',
+            },
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL, verbose_name='автор'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post', verbose_name='пост'),
+        ),
+        migrations.RunPython(seed_comment_sequence,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+SEED_BATCH_SIZE = 1000
+
+
+def fill_search_titles(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    batch = []
+    for group in Group.objects.only('pk', 'title').iterator():
+        group.search_title = group.title.lower()
+        batch.append(group)
+        if len(batch) == SEED_BATCH_SIZE:
+            Group.objects.bulk_update(batch, ('search_title',))
+            batch = []
+    Group.objects.bulk_update(batch, ('search_title',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_group_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='search_title',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200, verbose_name='заголовок для поиска'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_search_titles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 2.2.28 on 2026-10-19 13:05
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import (DEFAULT_DB_ALIAS, connections, migrations, models,
+                       transaction)
+
+from posts.sharding import COMMENT_ID_STRIDE, copy_rows
+
+MOVE_BATCH_SIZE = 1000
+
+
+def has_table(alias, model):
+    return (model._meta.db_table
+            in connections[alias].introspection.table_names())
+
+
+def get_last_comment_id(apps, alias):
+    """The highest comment id handed out so far that ``alias`` may hold.
+
+    The old shared sequence on the default database covers every comment
+    created before shards had their own, so only the default database and
+    the shard being migrated are read; other shards are never connected to.
+    """
+    CommentSequence = apps.get_model('posts', 'CommentSequence')
+    last_ids = []
+    if has_table(DEFAULT_DB_ALIAS, CommentSequence):
+        # The old shared sequence knows ids of comments deleted since.
+        sequence = CommentSequence.objects.using(DEFAULT_DB_ALIAS)
+        last_ids.append(sequence.create().pk)
+        sequence.all().delete()
+    for using in (DEFAULT_DB_ALIAS, alias):
+        for model_name in ('Comment', 'ArchivedComment'):
+            model = apps.get_model('posts', model_name)
+            if has_table(using, model):
+                last_ids.append(
+                    model.objects.using(using)
+                    .aggregate(last_id=models.Max('id'))['last_id'] or 0)
+    return max(last_ids, default=0)
+
+
+def move_comments(apps, alias):
+    """Move the comments of this shard's posts off the default database."""
+    Comment = apps.get_model('posts', 'Comment')
+    if not has_table(DEFAULT_DB_ALIAS, Comment):
+        return
+    source = Comment.objects.using(DEFAULT_DB_ALIAS).order_by('pk')
+    shards = settings.COMMENT_SHARDS
+    last_pk = 0
+    while True:
+        batch = list(source.filter(pk__gt=last_pk)[:MOVE_BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        moved = [comment for comment in batch
+                 if shards[comment.post_id % len(shards)] == alias]
+        if not moved:
+            continue
+        with transaction.atomic(using=alias):
+            copy_rows(Comment, moved, alias)
+        source.filter(
+            pk__in=[comment.pk for comment in moved]
+        )._raw_delete(DEFAULT_DB_ALIAS)
+
+
+def seed_sequence(apps, schema_editor, last_id):
+    """Start the shard's ids after ``last_id``."""
+    connection = schema_editor.connection
+    CommentSequence = apps.get_model('posts', 'CommentSequence')
+    number = last_id // COMMENT_ID_STRIDE
+    if not number:
+        return
+    sequence = CommentSequence.objects.using(connection.alias)
+    sequence.create(id=number)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(),
+                                                     [CommentSequence]):
+            cursor.execute(sql)
+    sequence.all().delete()
+
+
+def prepare_shard(apps, schema_editor):
+    """Give a comment shard its own sequence and change log.
+
+    Shards migrated before they had these tables get them now. Comments
+    still on the default database are moved to their shards, so this
+    must run after the default database is migrated.
+    """
+    alias = schema_editor.connection.alias
+    if alias == DEFAULT_DB_ALIAS or alias not in settings.COMMENT_SHARDS:
+        return
+    for model_name in ('CommentSequence', 'Change'):
+        model = apps.get_model('posts', model_name)
+        if not has_table(alias, model):
+            schema_editor.create_model(model)
+    move_comments(apps, alias)
+    seed_sequence(apps, schema_editor, get_last_comment_id(apps, alias))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0024_group_search_title'),
+    ]
+
+    operations = [
+        migrations.RunPython(prepare_shard, migrations.RunPython.noop,
+                             hints={'model_name': 'change'}),
+    ]
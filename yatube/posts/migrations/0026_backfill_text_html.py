@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-19 15:10
+
+from django.db import migrations
+
+from posts.models import render_text
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_text_html(apps, schema_editor):
+    """Render posts saved before they had an HTML body and an excerpt."""
+    alias = schema_editor.connection.alias
+    for model_name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', model_name)
+        posts = (model.objects.using(alias).filter(text_html='')
+                 .only('pk', 'text').order_by('pk'))
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:BACKFILL_BATCH_SIZE])
+            if not batch:
+                break
+            for post in batch:
+                post.text_html, post.excerpt = render_text(post.text)
+            model.objects.using(alias).bulk_update(
+                batch, ('text_html', 'excerpt'))
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_shard_local_writes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_text_html, migrations.RunPython.noop,
+                             hints={'model_name': 'post'}),
+    ]
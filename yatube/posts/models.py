@@ -1,16 +1,30 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from .sharding import (COMMENT_ID_STRIDE, CommentManager, get_comment_shard,
+                       get_shard_index)
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
+image_storage = ContentAddressedStorage()
 
 
+def render_text(text):
+    return (linebreaksbr(text, autoescape=True),
+            Truncator(text).chars(settings.POST_EXCERPT_LENGTH))
 
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='заголовок')
     slug = models.SlugField(unique=True, verbose_name='уникальный id')
     description = models.TextField(verbose_name='описание')
+    search_title = models.CharField(max_length=200, editable=False,
+                                    db_index=True,
+                                    verbose_name='заголовок для поиска')
 
     class Meta:
         verbose_name = 'группа'
@@ -19,9 +33,21 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.search_title = self.title.lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_title'}
+        super().save(*args, **kwargs)
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name='текст')
+    text_html = models.TextField(editable=False, blank=True,
+                                 verbose_name='текст в HTML')
+    excerpt = models.CharField(max_length=settings.POST_EXCERPT_LENGTH,
+                               editable=False, blank=True,
+                               verbose_name='анонс')
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name='дата')
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -38,16 +64,56 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=image_storage,
+        blank=True,
+        db_index=True
     )
+    views = models.PositiveIntegerField(default=0, editable=False,
+                                        verbose_name='просмотры')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date',),
+                         name='posts_post_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='posts_post_author_pub_idx'),
+            models.Index(fields=('group', '-pub_date'),
+                         name='posts_post_group_pub_idx'),
+        )
         verbose_name = 'пост'
         verbose_name_plural = 'посты'
 
     def __str__(self):
-        return f"{self.text[:15]}"
+        return f"{(self.excerpt or self.text)[:15]}"
+
+    def save(self, *args, **kwargs):
+        self.text_html, self.excerpt = render_text(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html', 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class CommentSequence(models.Model):
+    """Hands out comment ids on every shard.
+
+    Each shard keeps its own sequence and interleaves its ids with the
+    other shards' by its index, so ids stay unique across shards without
+    writing to the default database.
+    """
+
+    class Meta:
+        verbose_name = 'счётчик комментариев'
+        verbose_name_plural = 'счётчики комментариев'
+
+    @classmethod
+    def allocate(cls, alias, count=1):
+        index = get_shard_index(alias)
+        sequence = cls.objects.using(alias)
+        numbers = [sequence.create().pk for _ in range(count)]
+        sequence.filter(pk__lte=numbers[-1]).delete()
+        return [number * COMMENT_ID_STRIDE + index for number in numbers]
 
 
 class Comment(models.Model):
@@ -55,19 +121,178 @@ class Comment(models.Model):
     created = models.DateTimeField(auto_now_add=True, verbose_name='дата')
     post = models.ForeignKey(Post,
                              on_delete=models.CASCADE,
+                             db_constraint=False,
                              related_name='comments',
                              verbose_name='пост'
                              )
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
+                               db_constraint=False,
                                related_name='comments',
                                verbose_name='автор'
                                )
 
+    objects = CommentManager()
+
     class Meta:
         ordering = ('-created',)
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
 
     def __str__(self):
-        return f"{self.text[:15]}"
\ No newline at end of file
+        return f"{self.text[:15]}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is None:
+            self.pk, = CommentSequence.allocate(
+                get_comment_shard(self.post_id))
+            kwargs['force_insert'] = True
+        super().save(*args, **kwargs)
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='follower',
+                             verbose_name='подписчик'
+                             )
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='following',
+                               verbose_name='автор'
+                               )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='prevent_self_follow'),
+        )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='posts_follow_author_user_idx'),
+        )
+        verbose_name = 'подписка'
+        verbose_name_plural = 'подписки'
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class ArchivedPost(models.Model):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='текст')
+    text_html = models.TextField(editable=False, blank=True,
+                                 verbose_name='текст в HTML')
+    excerpt = models.CharField(max_length=settings.POST_EXCERPT_LENGTH,
+                               editable=False, blank=True,
+                               verbose_name='анонс')
+    pub_date = models.DateTimeField(verbose_name='дата')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_posts',
+                               verbose_name='автор'
+                               )
+    group = models.ForeignKey(Group,
+                              on_delete=models.SET_NULL,
+                              related_name='archived_posts',
+                              blank=True,
+                              null=True,
+                              verbose_name='группа'
+                              )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=image_storage,
+        blank=True,
+        db_index=True
+    )
+    views = models.PositiveIntegerField(default=0, editable=False,
+                                        verbose_name='просмотры')
+    archived = models.DateTimeField(auto_now_add=True,
+                                    verbose_name='дата архивации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date',),
+                         name='posts_arch_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='posts_arch_author_pub_idx'),
+            models.Index(fields=('group', '-pub_date'),
+                         name='posts_arch_group_pub_idx'),
+        )
+        verbose_name = 'архивный пост'
+        verbose_name_plural = 'архивные посты'
+
+    def __str__(self):
+        return f"{(self.excerpt or self.text)[:15]}"
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='текст')
+    created = models.DateTimeField(verbose_name='дата')
+    post = models.ForeignKey(ArchivedPost,
+                             on_delete=models.CASCADE,
+                             related_name='comments',
+                             verbose_name='пост'
+                             )
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_comments',
+                               verbose_name='автор'
+                               )
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'архивный комментарий'
+        verbose_name_plural = 'архивные комментарии'
+
+    def __str__(self):
+        return f"{self.text[:15]}"
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(Post,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='trending',
+                                verbose_name='пост'
+                                )
+    score = models.FloatField(db_index=True, verbose_name='рейтинг')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'популярный пост'
+        verbose_name_plural = 'популярные посты'
+
+    def __str__(self):
+        return f'{self.post} ({self.score:.2f})'
+
+
+class Change(models.Model):
+    """One entry of the change log behind the sync API.
+
+    Only the latest change of every object is kept, so the log holds one
+    row per live object plus tombstones of the deleted ones, and its id is
+    the cursor clients sync from.
+    """
+
+    resource = models.CharField(max_length=20, verbose_name='ресурс')
+    object_id = models.IntegerField(verbose_name='идентификатор объекта')
+    deleted = models.BooleanField(default=False, verbose_name='удалён')
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=('resource', 'object_id'),
+                         name='posts_change_object_idx'),
+        ]
+        verbose_name = 'изменение'
+        verbose_name_plural = 'изменения'
+
+    def __str__(self):
+        action = 'удаление' if self.deleted else 'изменение'
+        return f'{self.resource} {self.object_id}: {action}'
@@ -0,0 +1,94 @@
+from collections import Counter
+
+from django.db import transaction
+
+from core.cache import bump_content_version
+
+from .caching import invalidate_following_ids
+from .media import release_image
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Post,
+                     TrendingPost)
+from .sync import COMMENTS, POSTS, record_changes
+
+
+def raw_delete(queryset):
+    return queryset._raw_delete(queryset.db)
+
+
+def iter_batches(queryset, batch_size, fields=('pk',)):
+    """Yield the rows of ``queryset`` in pk order, ``batch_size`` at a time.
+
+    Only the requested columns of one batch are ever held in memory, no
+    matter how many rows the queryset matches.
+    """
+    last_pk = 0
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list(*fields)[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def get_post_comments(comment_model, post_ids):
+    if comment_model is Comment:
+        return Comment.objects.in_shards(post_ids)
+    return [comment_model.objects.filter(post_id__in=post_ids)]
+
+
+def purge_comments(comments, batch_size, stats):
+    for batch in iter_batches(comments, batch_size):
+        comment_ids = [pk for pk, in batch]
+        with transaction.atomic(using=comments.db):
+            record_changes(COMMENTS, comment_ids, deleted=True,
+                           using=comments.db)
+            stats['comments'] += raw_delete(
+                comments.filter(pk__in=comment_ids))
+
+
+def purge_posts(model, comment_model, posts, batch_size, stats):
+    for batch in iter_batches(posts, batch_size, ('pk', 'image')):
+        post_ids = [pk for pk, _ in batch]
+        for comments in get_post_comments(comment_model, post_ids):
+            purge_comments(comments, batch_size, stats)
+        with transaction.atomic():
+            record_changes(POSTS, post_ids, deleted=True)
+            if model is Post:
+                raw_delete(TrendingPost.objects.filter(post_id__in=post_ids))
+            stats['posts'] += raw_delete(
+                model.objects.filter(pk__in=post_ids))
+        for image in {image for _, image in batch}:
+            if release_image(image):
+                stats['images'] += 1
+
+
+def purge_user(user, batch_size):
+    """Delete a user with all their posts, comments, follows and images.
+
+    Rows go away in bounded batches with raw DELETEs instead of Django's
+    collector, so neither memory use nor per-object signals grow with the
+    amount of content. Images still used by other posts are kept. Sync API
+    tombstones are written with every batch, caches are fixed up once at
+    the end.
+    """
+    stats = Counter()
+    for comments in (*Comment.objects.in_shards(),
+                     ArchivedComment.objects.all()):
+        purge_comments(comments.filter(author=user), batch_size, stats)
+    purge_posts(Post, Comment, Post.objects.filter(author=user),
+                batch_size, stats)
+    purge_posts(ArchivedPost, ArchivedComment,
+                ArchivedPost.objects.filter(author=user), batch_size, stats)
+    for batch in iter_batches(Follow.objects.filter(author=user),
+                              batch_size, ('pk', 'user_id')):
+        raw_delete(Follow.objects.filter(pk__in=[pk for pk, _ in batch]))
+        for _, follower_id in batch:
+            invalidate_following_ids(follower_id)
+    raw_delete(Follow.objects.filter(user=user))
+    invalidate_following_ids(user.pk)
+    user.delete()
+    bump_content_version()
+    return stats
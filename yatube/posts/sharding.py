@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+COMMENT_LABEL = 'posts.comment'
+POST_LABEL = 'posts.post'
+# Models that live on every shard: the comments, the sequence their ids
+# come from and the change log their sync entries go to.
+SHARD_MODELS = ('comment', 'commentsequence', 'change')
+# Shard ``i`` hands out the comment ids ``i + COMMENT_ID_STRIDE * n``. The
+# stride caps the number of shards and must never change once ids exist.
+COMMENT_ID_STRIDE = 16
+
+
+def get_comment_shard(post_id):
+    shards = settings.COMMENT_SHARDS
+    return shards[post_id % len(shards)]
+
+
+def get_shard_index(alias):
+    index = settings.COMMENT_SHARDS.index(alias)
+    if index >= COMMENT_ID_STRIDE:
+        raise ImproperlyConfigured(
+            f'Comment shards are limited to {COMMENT_ID_STRIDE}')
+    return index
+
+
+def group_by_shard(post_ids):
+    shards = defaultdict(list)
+    for post_id in post_ids:
+        shards[get_comment_shard(post_id)].append(post_id)
+    return shards
+
+
+def copy_rows(model, objs, alias):
+    """Insert ``objs`` on ``alias`` exactly as they are.
+
+    Unlike ``bulk_create`` this keeps ``auto_now_add`` dates, and rows
+    already on ``alias`` are skipped, so an interrupted copy can be run
+    again.
+    """
+    fields = model._meta.concrete_fields
+    batch_size = connections[alias].ops.bulk_batch_size(fields, objs)
+    queryset = model._base_manager.using(alias)
+    for start in range(0, len(objs), batch_size):
+        queryset._insert(objs[start:start + batch_size], fields, raw=True,
+                         ignore_conflicts=True)
+
+
+class CommentShardRouter:
+    """Route comments to the shard of their post, everything else to default.
+
+    The shard is taken from the ``instance`` hint: the comment itself when
+    it is saved or deleted, the post when ``post.comments`` is used. Bare
+    ``Comment.objects`` queries are not routed and have to name their shard
+    through the manager.
+    """
+
+    def get_shard(self, hints):
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        label = instance._meta.label_lower
+        if label == COMMENT_LABEL:
+            post_id = instance.post_id
+        elif label == POST_LABEL:
+            post_id = instance.pk
+        else:
+            return None
+        return None if post_id is None else get_comment_shard(post_id)
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower == COMMENT_LABEL:
+            return self.get_shard(hints)
+        return DEFAULT_DB_ALIAS
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if COMMENT_LABEL in (obj1._meta.label_lower, obj2._meta.label_lower):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return None
+        return app_label == 'posts' and model_name in SHARD_MODELS
+
+
+class CommentManager(models.Manager):
+    """Comment manager aware of the shards.
+
+    ``create`` and ``bulk_create`` place every comment on the shard of its
+    post with an id from that shard's sequence; ``for_post`` and
+    ``in_shards`` build querysets bound to the right shards.
+    """
+
+    def for_post(self, post_id):
+        return self.using(get_comment_shard(post_id)).filter(post_id=post_id)
+
+    def in_shards(self, post_ids=None):
+        if post_ids is None:
+            return [self.using(alias) for alias in settings.COMMENT_SHARDS]
+        return [
+            self.using(alias).filter(post_id__in=shard_post_ids)
+            for alias, shard_post_ids in group_by_shard(post_ids).items()
+        ]
+
+    def create(self, **kwargs):
+        comment = self.model(**kwargs)
+        comment.save(force_insert=True, using=self._db)
+        return comment
+
+    def bulk_create(self, objs, **kwargs):
+        from .models import CommentSequence
+
+        objs = list(objs)
+        shards = defaultdict(list)
+        for comment in objs:
+            shards[get_comment_shard(comment.post_id)].append(comment)
+        for alias, shard_objs in shards.items():
+            new_objs = [comment for comment in shard_objs
+                        if comment.pk is None]
+            if new_objs:
+                ids = CommentSequence.allocate(alias, len(new_objs))
+                for comment, pk in zip(new_objs, ids):
+                    comment.pk = pk
+            self.get_queryset().using(alias).bulk_create(shard_objs, **kwargs)
+        return objs
@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core.cache import bump_content_version
+
+from .caching import (POST_SCOPE, invalidate_cached_object,
+                      invalidate_following_ids)
+from .live import publish_comment
+from .media import release_image
+from .models import Comment, Follow, Group, Post, User
+from .sync import COMMENTS, GROUPS, POSTS, record_changes
+
+CACHED_LOOKUPS = {
+    User: 'username',
+    Group: 'slug',
+}
+USER_DISPLAY_FIELDS = {'username', 'first_name', 'last_name'}
+SYNC_RESOURCES = {
+    Post: POSTS,
+    Comment: COMMENTS,
+    Group: GROUPS,
+}
+
+
+@receiver((post_save, post_delete), sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_following_ids(instance.user_id)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Group)
+def cached_object_renamed(sender, instance, update_fields=None, **kwargs):
+    field = CACHED_LOOKUPS[sender]
+    if instance.pk is None or (update_fields and field not in update_fields):
+        return
+    old_value = (sender._default_manager.filter(pk=instance.pk)
+                 .values_list(field, flat=True).first())
+    if old_value is not None and old_value != getattr(instance, field):
+        invalidate_cached_object(sender, field, old_value)
+
+
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=Group)
+def cached_object_changed(sender, instance, **kwargs):
+    field = CACHED_LOOKUPS[sender]
+    invalidate_cached_object(sender, field, getattr(instance, field))
+
+
+@receiver((post_save, post_delete), sender=Post)
+@receiver((post_save, post_delete), sender=Group)
+def content_changed(sender, **kwargs):
+    bump_content_version()
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comments_changed(sender, instance, **kwargs):
+    bump_content_version(POST_SCOPE.format(post_id=instance.post_id))
+
+
+@receiver((post_save, post_delete), sender=User)
+def author_changed(sender, update_fields=None, **kwargs):
+    if update_fields is None or USER_DISPLAY_FIELDS & set(update_fields):
+        bump_content_version()
+
+
+@receiver(pre_save, sender=Post)
+def post_image_replaced(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields and 'image' not in update_fields):
+        return
+    old_image = (Post.objects.filter(pk=instance.pk)
+                 .values_list('image', flat=True).first())
+    if old_image and old_image != instance.image.name:
+        instance._replaced_image = old_image
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    replaced_image = instance.__dict__.pop('_replaced_image', None)
+    if replaced_image:
+        release_image(replaced_image)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Group)
+def synced_object_saved(sender, instance, using, **kwargs):
+    record_changes(SYNC_RESOURCES[sender], [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Group)
+def synced_object_deleted(sender, instance, using, **kwargs):
+    record_changes(SYNC_RESOURCES[sender], [instance.pk], deleted=True,
+                   using=using)
+
+
+@receiver(pre_delete, sender=Post)
+def post_comments_deleted(sender, instance, **kwargs):
+    Comment.objects.for_post(instance.pk).delete()
+
+
+@receiver(pre_delete, sender=User)
+def user_comments_deleted(sender, instance, **kwargs):
+    for comments in Comment.objects.in_shards():
+        comments.filter(author_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Group)
+def group_posts_detached(sender, instance, **kwargs):
+    record_changes(POSTS, instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Comment)
+def comment_added(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_comment(instance))
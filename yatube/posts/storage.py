@@ -0,0 +1,51 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+CONTENT_NAME_RE = re.compile(
+    r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def get_content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    return bool(CONTENT_NAME_RE.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names every file after its SHA-256.
+
+    An upload whose bytes are already stored resolves to the existing file
+    and is not written again, so sorl finds its thumbnails under the same
+    key as well; the file is touched so ``gc_media`` sees it as new. Names
+    never change their content, which makes the URLs safe to cache
+    forever.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        digest = get_content_hash(content)
+        extension = os.path.splitext(name)[1].lower()
+        name = '/'.join(filter(None, (
+            os.path.dirname(name), digest[:2], digest[2:4],
+            digest + extension,
+        )))
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                return self._save(name, content)
+            return name
+        return self._save(name, content)
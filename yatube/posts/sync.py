@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Change
+
+POSTS = 'posts'
+COMMENTS = 'comments'
+GROUPS = 'groups'
+
+
+def get_change_logs():
+    """Databases with a change log: default, then every comment shard.
+
+    Comment changes are logged on the comment's shard, so writing a comment
+    never touches the default database.
+    """
+    return tuple(dict.fromkeys((DEFAULT_DB_ALIAS, *settings.COMMENT_SHARDS)))
+
+
+def record_changes(resource, object_ids, deleted=False,
+                   using=DEFAULT_DB_ALIAS):
+    """Move objects to the end of the change log on ``using``.
+
+    Their earlier entries are dropped, so a client syncing past them gets
+    every object at most once, in its latest state.
+    """
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    changes = Change.objects.using(using)
+    with transaction.atomic(using=using):
+        changes.filter(resource=resource, object_id__in=object_ids).delete()
+        changes.bulk_create(
+            Change(resource=resource, object_id=object_id, deleted=deleted)
+            for object_id in object_ids
+        )
@@ -0,0 +1,48 @@
+import logging
+
+from django import template
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+
+def get_variants(image, image_format):
+    width, height = settings.POST_IMAGE_SIZE
+    return [
+        get_thumbnail(image, f'{variant}x{round(variant * height / width)}',
+                      crop='center', upscale=True, format=image_format)
+        for variant in settings.POST_IMAGE_WIDTHS
+    ]
+
+
+def get_srcset(thumbnails):
+    return ', '.join(f'{thumbnail.url} {thumbnail.width}w'
+                     for thumbnail in thumbnails)
+
+
+@register.inclusion_tag('posts/includes/responsive_image.html')
+def responsive_image(image, lazy=True):
+    """Post image cropped to every width of ``POST_IMAGE_WIDTHS``.
+
+    Browsers pick the smallest variant that fills the slot, in WebP when
+    they support it. Errors are logged and render nothing, the same way
+    sorl's own ``thumbnail`` tag handles them.
+    """
+    if not image:
+        return {}
+    try:
+        thumbnails = get_variants(image, 'JPEG')
+        webp_thumbnails = get_variants(image, 'WEBP')
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', image)
+        return {}
+    return {
+        'fallback': thumbnails[-1],
+        'srcset': get_srcset(thumbnails),
+        'webp_srcset': get_srcset(webp_thumbnails),
+        'sizes': settings.POST_IMAGE_SIZES,
+        'lazy': lazy,
+    }
@@ -0,0 +1,188 @@
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import ArchivedPost, Change, Comment, Group, Post
+from ..purge import purge_user
+from ..sharding import get_comment_shard
+from ..sync import get_change_logs
+
+User = get_user_model()
+
+
+class SyncApiTest(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(author=self.user, text='Первый пост',
+                                        group=self.group)
+        self.comment = Comment.objects.create(post=self.post,
+                                              author=self.user,
+                                              text='Комментарий')
+
+    def sync(self, since=0, **params):
+        response = self.guest_client.get(reverse('posts:api_sync'),
+                                         {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initial_sync(self):
+        """Синхронизация с нуля отдаёт группы, посты и комментарии."""
+        data = self.sync()
+        self.assertEqual(data['changed']['groups'][0]['slug'],
+                         self.group.slug)
+        post = data['changed']['posts'][0]
+        self.assertEqual(post['text'], self.post.text)
+        self.assertEqual(post['author'], self.user.username)
+        self.assertEqual(post['group'], self.group.pk)
+        self.assertEqual(data['changed']['comments'][0]['post'], self.post.pk)
+        self.assertFalse(data['has_more'])
+
+    def test_unchanged_feed_costs_one_query(self):
+        """Опрос без изменений стоит запроса к каждому журналу."""
+        cursor = self.sync()['cursor']
+        cache.clear()
+        with ExitStack() as stack:
+            for alias in get_change_logs():
+                stack.enter_context(self.assertNumQueries(1, using=alias))
+            data = self.sync(cursor)
+        self.assertEqual(data, {'cursor': cursor, 'has_more': False,
+                                'changed': {}, 'deleted': {}})
+
+    def test_delta_and_tombstones(self):
+        """После курсора приходят только изменённые и удалённые объекты."""
+        cursor = self.sync()['cursor']
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        comment_id = self.comment.pk
+        self.comment.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data['changed'], {'posts': [{
+            'id': self.post.pk, 'text': 'Исправленный пост',
+            'pub_date': data['changed']['posts'][0]['pub_date'],
+            'author': self.user.username, 'group': self.group.pk,
+            'image': None, 'views': 0,
+        }]})
+        self.assertEqual(data['deleted'], {'comments': [comment_id]})
+        self.assertEqual(self.sync(data['cursor'])['changed'], {})
+
+    def test_new_comment_seen_by_next_poll(self):
+        """Новый комментарий приходит при следующем опросе, а не из
+        кэша страниц."""
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['changed'], {})
+        comment = Comment.objects.create(post=self.post, author=self.user,
+                                         text='Новый комментарий')
+        data = self.sync(cursor)
+        self.assertEqual([item['id'] for item in data['changed']['comments']],
+                         [comment.pk])
+
+    def test_comment_changes_on_shard(self):
+        """Изменения комментариев пишутся в журнал шарда, а не в общий."""
+        shard = get_comment_shard(self.post.pk)
+        self.assertTrue(Change.objects.using(shard).filter(
+            resource='comments', object_id=self.comment.pk).exists())
+        self.assertFalse(Change.objects.filter(resource='comments').exists())
+
+    def test_plain_cursor(self):
+        """Числовой курсор считается позицией в общем журнале."""
+        default_cursor = self.sync()['cursor'].split('.')[0]
+        data = self.sync(default_cursor)
+        self.assertNotIn('posts', data['changed'])
+        self.assertEqual(data['changed']['comments'][0]['id'],
+                         self.comment.pk)
+
+    @override_settings(API_SYNC_LIMIT=1)
+    def test_sync_pages(self):
+        """Длинный журнал изменений отдаётся порциями."""
+        data = self.sync()
+        self.assertTrue(data['has_more'])
+        self.assertEqual(sum(map(len, data['changed'].values())), 1)
+
+    def test_sparse_fields(self):
+        """Можно запросить только нужные поля."""
+        data = self.sync(**{'fields[posts]': 'text'})
+        self.assertEqual(data['changed']['posts'],
+                         [{'id': self.post.pk, 'text': self.post.text}])
+        response = self.guest_client.get(reverse('posts:api_sync'),
+                                         {'fields[posts]': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_purge_writes_tombstones(self):
+        """Удаление пользователя порциями тоже оставляет надгробия."""
+        cursor = self.sync()['cursor']
+        post_id, comment_id = self.post.pk, self.comment.pk
+        purge_user(self.user, batch_size=10)
+        deleted = self.sync(cursor)['deleted']
+        self.assertEqual(deleted['posts'], [post_id])
+        self.assertEqual(deleted['comments'], [comment_id])
+
+
+class FetchApiTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Новый пост')
+        cls.archived = ArchivedPost.objects.create(
+            id=10_000, author=cls.user, text='Старый пост',
+            pub_date=cls.post.pub_date,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def fetch(self, resource, **params):
+        return self.guest_client.get(
+            reverse('posts:api_fetch', args=(resource,)), params)
+
+    def test_fetch_by_ids(self):
+        """Объекты отдаются пачкой в порядке запроса, включая архивные."""
+        ids = f'{self.archived.pk},999,{self.post.pk}'
+        response = self.fetch('posts', ids=ids, fields='text,author')
+        self.assertEqual(response.json(), {'posts': [
+            {'id': self.archived.pk, 'text': 'Старый пост',
+             'author': self.user.username},
+            {'id': self.post.pk, 'text': 'Новый пост',
+             'author': self.user.username},
+        ]})
+
+    def test_fetch_not_page_cached(self):
+        """Изменённый комментарий отдаётся сразу, а не из кэша страниц."""
+        comment = Comment.objects.create(post=self.post, author=self.user,
+                                         text='Комментарий')
+        ids = str(comment.pk)
+        self.fetch('comments', ids=ids, fields='text')
+        comment.text = 'Исправленный комментарий'
+        comment.save()
+        response = self.fetch('comments', ids=ids, fields='text')
+        self.assertEqual(response.json()['comments'][0]['text'],
+                         'Исправленный комментарий')
+
+    @override_settings(API_FETCH_LIMIT=1)
+    def test_bad_requests(self):
+        """Ошибочные запросы отклоняются."""
+        cases = (
+            ('posts', {'ids': f'{self.post.pk},{self.archived.pk}'}, 400),
+            ('posts', {'ids': 'abc'}, 400),
+            ('posts', {}, 400),
+            ('users', {'ids': '1'}, 404),
+        )
+        for resource, params, status in cases:
+            with self.subTest(resource=resource, params=params):
+                self.assertEqual(self.fetch(resource, **params).status_code,
+                                 status)
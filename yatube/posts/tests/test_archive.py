@@ -0,0 +1,127 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+from ..sharding import get_comment_shard
+
+User = get_user_model()
+
+OLD_POSTS = 7
+NEW_POSTS = 6
+
+
+class ArchiveTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        old_date = timezone.now() - timedelta(
+            days=settings.POST_ARCHIVE_AGE_DAYS + 1)
+        for i in range(OLD_POSTS):
+            post = Post.objects.create(author=cls.user, text=f'old {i}',
+                                       group=cls.group)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old_date + timedelta(minutes=i))
+        cls.old_post = post
+        cls.comment = Comment.objects.create(post=cls.old_post,
+                                             author=cls.user,
+                                             text='старый коммент')
+        for i in range(NEW_POSTS):
+            Post.objects.create(author=cls.user, text=f'new {i}',
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def archive(self, **options):
+        call_command('archive_posts', stdout=StringIO(), **options)
+
+    def test_command_moves_old_posts_and_comments(self):
+        """Команда переносит старые посты и комментарии в архив."""
+        self.archive(batch_size=3)
+        self.assertEqual(Post.objects.count(), NEW_POSTS)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertFalse(any(comments.exists()
+                             for comments in Comment.objects.in_shards()))
+        self.assertTrue(
+            ArchivedComment.objects.filter(pk=self.comment.pk,
+                                           post_id=self.old_post.pk).exists()
+        )
+
+    def test_comment_added_during_copy_is_kept(self):
+        """Комментарий, добавленный во время копирования, не теряется."""
+        copy_comments = archive.archive_comments
+        late_comments = []
+
+        def copy_then_comment(comments):
+            ids = copy_comments(comments)
+            if (not late_comments
+                    and comments.db == get_comment_shard(self.old_post.pk)):
+                late_comments.append(Comment.objects.create(
+                    post=self.old_post, author=self.user, text='поздний'))
+            return ids
+
+        with mock.patch('posts.archive.archive_comments',
+                        side_effect=copy_then_comment):
+            self.archive()
+        self.assertTrue(ArchivedComment.objects.filter(
+            pk=late_comments[0].pk, text='поздний').exists())
+        self.assertFalse(
+            Comment.objects.for_post(self.old_post.pk).exists())
+
+    def test_command_is_resumable(self):
+        """Повторный запуск команды ничего не дублирует."""
+        self.archive(batch_size=2)
+        self.archive(batch_size=2)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+
+    def test_feeds_fall_back_to_archive(self):
+        """Старые страницы лент показывают архивные посты."""
+        self.archive()
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                second = self.guest_client.get(url + '?page=2')
+                self.assertEqual(first.context['page_obj'].paginator.count,
+                                 OLD_POSTS + NEW_POSTS)
+                texts = [post.text for post in first.context['page_obj']]
+                texts += [post.text for post in second.context['page_obj']]
+                self.assertEqual(
+                    texts,
+                    [f'new {i}' for i in reversed(range(NEW_POSTS))]
+                    + [f'old {i}' for i in reversed(range(OLD_POSTS))]
+                )
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Страница архивного поста доступна вместе с комментариями."""
+        self.archive()
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.old_post.pk}))
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, self.old_post.text)
+        self.assertEqual(list(response.context['comments'])[0].text,
+                         self.comment.text)
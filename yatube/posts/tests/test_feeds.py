@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Текст для ленты',
+            group=cls.group,
+        )
+        cls.archived = ArchivedPost.objects.create(
+            id=10_000, author=cls.user, text='Старый пост',
+            pub_date=cls.post.pub_date,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds_list_posts(self):
+        """Ленты RSS и Atom отдают записи сайта, группы и автора."""
+        feeds = {
+            reverse('posts:feed_rss'): 'application/rss+xml',
+            reverse('posts:feed_atom'): 'application/atom+xml',
+            reverse('posts:group_feed_rss', args=(self.group.slug,)):
+                'application/rss+xml',
+            reverse('posts:group_feed_atom', args=(self.group.slug,)):
+                'application/atom+xml',
+            reverse('posts:profile_feed_rss', args=(self.user.username,)):
+                'application/rss+xml',
+            reverse('posts:profile_feed_atom', args=(self.user.username,)):
+                'application/atom+xml',
+        }
+        post_url = reverse('posts:post_detail', args=(self.post.pk,))
+        for url, content_type in feeds.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(content_type))
+                self.assertContains(response, post_url)
+                self.assertContains(response, self.post.excerpt)
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы возвращает 404."""
+        response = self.guest_client.get(
+            reverse('posts:group_feed_rss', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag получает 304 до изменения записей."""
+        url = reverse('posts:feed_atom')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, text='Новая запись')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новая запись')
+
+    def test_feed_cached_until_post_write(self):
+        """Лента отдаётся из кэша без запросов к базе до новой записи."""
+        url = reverse('posts:feed_rss')
+        self.client.force_login(self.user)
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, self.post.excerpt)
+        Post.objects.create(author=self.user, text='Свежая запись')
+        self.assertContains(self.client.get(url), 'Свежая запись')
+
+    def test_sitemap_index_lists_pages(self):
+        """Индекс карты сайта ссылается на страницы до последней записи."""
+        response = self.guest_client.get(reverse('posts:sitemap'))
+        self.assertContains(response, '<sitemapindex')
+        for page in (1, 2):
+            with self.subTest(page=page):
+                self.assertContains(
+                    response, reverse('posts:sitemap_page', args=(page,)))
+        self.assertNotContains(
+            response, reverse('posts:sitemap_page', args=(3,)))
+
+    def test_sitemap_pages_stream_posts(self):
+        """Страницы карты сайта перечисляют обычные и архивные записи."""
+        pages = {1: self.post.pk, 2: self.archived.pk}
+        for page, pk in pages.items():
+            with self.subTest(page=page):
+                url = reverse('posts:sitemap_page', args=(page,))
+                response = self.guest_client.get(url)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                for other in pages.values():
+                    self.assertEqual(
+                        reverse('posts:post_detail', args=(other,))
+                        in content, other == pk)
+                cached = self.guest_client.get(url)
+                self.assertFalse(cached.streaming)
+                self.assertEqual(cached.content.decode(), content)
+
+    def test_sitemap_page_out_of_range(self):
+        """Страница карты сайта после последней записи возвращает 404."""
+        for page in (0, 3):
+            with self.subTest(page=page):
+                response = self.guest_client.get(
+                    reverse('posts:sitemap_page', args=(page,)))
+                self.assertEqual(response.status_code, 404)
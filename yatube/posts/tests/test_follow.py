@@ -0,0 +1,174 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Post
+from ..views import get_follow_posts
+
+User = get_user_model()
+
+BENCH_FOLLOWS = 10_000
+BENCH_POSTS_PER_AUTHOR = 2
+BENCH_TIME_BUDGET = 1.0
+BENCH_SPARSE_FOLLOWS = 200
+BENCH_SPARSE_OTHER_POSTS = 20_000
+
+
+class FollowViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.post = Post.objects.create(author=cls.author, text='Пост автора')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_and_unfollow(self):
+        """Пользователь может подписаться на автора и отписаться от него."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,)))
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,)))
+        self.assertFalse(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+
+    def test_cannot_follow_self_or_twice(self):
+        """Нельзя подписаться на себя и подписаться дважды."""
+        for username in (self.user.username, self.author.username,
+                         self.author.username):
+            self.authorized_client.get(
+                reverse('posts:profile_follow', args=(username,)))
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+
+    def test_follow_index_shows_only_followed_authors(self):
+        """Пост появляется в ленте подписчика и не появляется у других."""
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'])
+
+        stranger_client = Client()
+        stranger_client.force_login(self.stranger)
+        response = stranger_client.get(reverse('posts:follow_index'))
+        self.assertNotIn(self.post, response.context['page_obj'])
+
+    def test_follow_set_cache_is_invalidated(self):
+        """Кэш подписок сбрасывается при подписке и отписке."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'])
+        Follow.objects.filter(user=self.user).delete()
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertNotIn(self.post, response.context['page_obj'])
+
+
+class FollowIndexBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        User.objects.bulk_create(
+            User(username=f'author{i}') for i in range(BENCH_FOLLOWS)
+        )
+        authors = list(
+            User.objects.filter(username__startswith='author')
+            .values_list('pk', flat=True)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, author_id=pk) for pk in authors
+        )
+        Post.objects.bulk_create(
+            Post(author_id=pk, text=f'text {pk}')
+            for pk in authors
+            for _ in range(BENCH_POSTS_PER_AUTHOR)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_index_query_plan_is_bounded(self):
+        """Лента подписок не сортирует все посты подписок целиком."""
+        queryset = get_follow_posts(self.user)
+        with connection.cursor() as cursor:
+            sql, params = queryset[:10].query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_index_with_10k_follows(self):
+        """Лента при 10k подписок укладывается в бюджет запросов и
+        времени."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        start = time.perf_counter()
+        with self.assertNumQueries(3):
+            response = self.authorized_client.get(url + '?page=3')
+        elapsed = time.perf_counter() - start
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            settings.FOLLOW_FEED_COUNT_LIMIT,
+        )
+        self.assertLess(elapsed, BENCH_TIME_BUDGET)
+
+
+class SparseFollowIndexBenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        User.objects.bulk_create(
+            User(username=f'author{i}') for i in range(BENCH_SPARSE_FOLLOWS)
+        )
+        authors = list(
+            User.objects.filter(username__startswith='author')
+            .values_list('pk', flat=True)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, author_id=pk) for pk in authors
+        )
+        Post.objects.bulk_create(
+            Post(author_id=pk, text=f'text {pk}') for pk in authors
+        )
+        stranger = User.objects.create_user(username='stranger')
+        Post.objects.bulk_create(
+            Post(author=stranger, text=f'other {i}')
+            for i in range(BENCH_SPARSE_OTHER_POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_sparse_follow_index(self):
+        """Лента редких подписок среди множества чужих постов укладывается
+        в бюджет времени и не пересчитывает число постов на каждой
+        странице."""
+        url = reverse('posts:follow_index')
+        start = time.perf_counter()
+        response = self.authorized_client.get(url)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         BENCH_SPARSE_FOLLOWS)
+        self.assertLess(elapsed, BENCH_TIME_BUDGET)
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url + '?page=2')
+        self.assertFalse(any('COUNT' in query['sql']
+                             for query in queries.captured_queries))
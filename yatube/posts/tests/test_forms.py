@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -17,6 +18,8 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -64,6 +67,7 @@ class PostFormTests(TestCase):
             content=small_gif,
             content_type='image/gif'
         )
+        digest = hashlib.sha256(small_gif).hexdigest()
         form_data = {
             'text': 'any text',
             'group': PostFormTests.group.pk,
@@ -80,7 +84,7 @@ class PostFormTests(TestCase):
                 id=Post.objects.order_by('-id')[0].id,
                 text=form_data['text'],
                 group=form_data['group'],
-                image='posts/small.gif',
+                image=f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif',
             ).exists()
         )
 
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from ..media import find_orphans, get_referenced_files, remove_orphan
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def media_path(name):
+    return os.path.join(TEMP_MEDIA_ROOT, name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('kept.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+        self.thumbnail = get_thumbnail(self.post.image, '960x339',
+                                       crop='center', upscale=True)
+        self.orphans = ('posts/replaced.gif', 'cache/ab/cd/stale.jpg')
+        for name in self.orphans:
+            os.makedirs(os.path.dirname(media_path(name)), exist_ok=True)
+            with open(media_path(name), 'wb') as orphan:
+                orphan.write(SMALL_GIF)
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def gc_media(self, **options):
+        out = StringIO()
+        call_command('gc_media', min_age=0, rate=0, stdout=out, **options)
+        return out.getvalue()
+
+    def assert_referenced_kept(self):
+        self.assertTrue(os.path.exists(media_path(self.post.image.name)))
+        self.assertTrue(os.path.exists(media_path(self.thumbnail.name)))
+
+    def test_dry_run_keeps_files(self):
+        """Пробный запуск только сообщает о лишних файлах."""
+        out = self.gc_media(dry_run=True)
+        for name in self.orphans:
+            with self.subTest(name=name):
+                self.assertIn(name, out)
+                self.assertTrue(os.path.exists(media_path(name)))
+        self.assertIn('лишних файлов: 2', out)
+
+    def test_orphans_are_deleted(self):
+        """Удаляются только файлы, на которые нет ссылок."""
+        self.gc_media(workers=2)
+        self.assert_referenced_kept()
+        for name in self.orphans:
+            with self.subTest(name=name):
+                self.assertFalse(os.path.exists(media_path(name)))
+
+    def test_orphans_are_quarantined(self):
+        """Лишние файлы переносятся в карантин."""
+        quarantine = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, quarantine, ignore_errors=True)
+        self.gc_media(quarantine=quarantine)
+        self.assert_referenced_kept()
+        for name in self.orphans:
+            with self.subTest(name=name):
+                self.assertFalse(os.path.exists(media_path(name)))
+                self.assertTrue(
+                    os.path.exists(os.path.join(quarantine, name)))
+
+    def test_recent_files_are_kept(self):
+        """Свежие файлы не трогаются."""
+        call_command('gc_media', stdout=StringIO())
+        for name in self.orphans:
+            with self.subTest(name=name):
+                self.assertTrue(os.path.exists(media_path(name)))
+
+    def test_orphan_reused_during_scan_is_kept(self):
+        """Файл, который пост начал использовать во время обхода, остаётся."""
+        orphans = [name for name, _ in
+                   find_orphans(get_referenced_files(), 1, 0)]
+        self.assertIn('posts/replaced.gif', orphans)
+        Post.objects.create(author=self.post.author, text='Повтор',
+                            image='posts/replaced.gif')
+        self.assertFalse(remove_orphan('posts/replaced.gif'))
+        self.assertTrue(os.path.exists(media_path('posts/replaced.gif')))
+
+    def test_touched_orphan_is_kept(self):
+        """Файл, обновлённый после обхода, не удаляется."""
+        name = 'cache/ab/cd/stale.jpg'
+        os.utime(media_path(name), (0, 0))
+        self.assertIn(name, [orphan for orphan, _ in
+                             find_orphans(get_referenced_files(), 1, 60)])
+        os.utime(media_path(name))
+        self.assertFalse(remove_orphan(name, min_age=60))
+        self.assertTrue(os.path.exists(media_path(name)))
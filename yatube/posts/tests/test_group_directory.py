@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..caching import get_group_directory
+from ..models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.busy = Group.objects.create(title='Активная', slug='busy',
+                                         description='Описание')
+        self.old = Group.objects.create(title='Архивная', slug='old',
+                                        description='Описание')
+        self.empty = Group.objects.create(title='Пустая', slug='empty',
+                                          description='Описание')
+        self.first = Post.objects.create(author=self.user, text='Первый',
+                                         group=self.busy)
+        self.latest = Post.objects.create(author=self.user, text='Последний',
+                                          group=self.busy)
+        ArchivedPost.objects.create(id=10_000, author=self.user,
+                                    text='Старый', group=self.busy,
+                                    pub_date=self.first.pub_date)
+        ArchivedPost.objects.create(id=10_001, author=self.user,
+                                    text='Из архива', excerpt='Из архива',
+                                    group=self.old,
+                                    pub_date=self.first.pub_date)
+
+    def get_groups(self):
+        return {group['slug']: group for group in get_group_directory()}
+
+    def test_directory_aggregates(self):
+        """Каталог показывает число записей, дату и анонс последней записи."""
+        groups = self.get_groups()
+        self.assertEqual(groups['busy']['posts_count'], 3)
+        self.assertEqual(groups['busy']['last_activity'],
+                         self.latest.pub_date)
+        self.assertEqual(groups['busy']['latest_excerpt'], 'Последний')
+        self.assertEqual(groups['old']['posts_count'], 1)
+        self.assertEqual(groups['old']['latest_excerpt'], 'Из архива')
+        self.assertEqual(groups['empty']['posts_count'], 0)
+        self.assertIsNone(groups['empty']['last_activity'])
+
+    def test_directory_is_one_cached_query(self):
+        """Каталог строится одним запросом и дальше берётся из кэша."""
+        with self.assertNumQueries(1):
+            get_group_directory()
+        with self.assertNumQueries(0):
+            get_group_directory()
+
+    def test_directory_invalidated_by_new_post(self):
+        """Новая запись сразу видна в каталоге."""
+        get_group_directory()
+        Post.objects.create(author=self.user, text='Свежий', group=self.old)
+        groups = self.get_groups()
+        self.assertEqual(groups['old']['posts_count'], 2)
+        self.assertEqual(groups['old']['latest_excerpt'], 'Свежий')
+
+    def test_directory_page(self):
+        """Страница каталога выводит все группы со ссылками."""
+        response = Client().get(reverse('posts:group_directory'))
+        self.assertTemplateUsed(response, 'posts/group_directory.html')
+        for group in (self.busy, self.old, self.empty):
+            with self.subTest(group=group.slug):
+                self.assertContains(
+                    response, reverse('posts:group_list', args=(group.slug,)))
+        self.assertContains(response, 'Последний')
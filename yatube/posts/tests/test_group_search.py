@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i:02}', slug=f'group-{i}',
+                  search_title=f'группа {i:02}', description='')
+            for i in range(30)
+        )
+        cls.group = Group.objects.create(title='Котики', slug='cats',
+                                         description='')
+        cls.post = Post.objects.create(author=cls.user, text='Пост',
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def search(self, query):
+        response = self.authorized_client.get(reverse('posts:group_search'),
+                                              {'q': query})
+        return [group['title'] for group in response.json()['results']]
+
+    @override_settings(GROUP_SEARCH_LIMIT=5)
+    def test_search_by_prefix(self):
+        """Поиск находит группы по началу названия без учёта регистра."""
+        self.assertEqual(self.search('КОТ'), ['Котики'])
+        self.assertEqual(self.search('группа 1'),
+                         [f'Группа 1{i}' for i in range(5)])
+        self.assertEqual(self.search('ики'), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_search_uses_index(self):
+        """Поиск по префиксу идёт по индексу, а не перебором таблицы."""
+        queries = CaptureQueriesContext(connection)
+        with queries:
+            self.search('гр')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[-1]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('SEARCH', plan)
+        self.assertIn('search_title', plan)
+
+    def test_form_does_not_load_groups(self):
+        """Форма поста не загружает список всех групп."""
+        urls = {
+            reverse('posts:post_create'): 0,
+            reverse('posts:post_edit', args=(self.post.pk,)): 1,
+        }
+        for url, group_queries in urls.items():
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                self.assertEqual(
+                    len([query for query in queries
+                         if 'FROM "posts_group"' in query['sql']]),
+                    group_queries
+                )
+                self.assertContains(response, reverse('posts:group_search'))
+        self.assertContains(response, 'value="Котики (cats)"')
+
+    def test_groups_with_same_title(self):
+        """Группы с одинаковым названием различаются в подсказках."""
+        Group.objects.create(title='Котики', slug='other-cats',
+                             description='')
+        response = self.authorized_client.get(reverse('posts:group_search'),
+                                              {'q': 'кот'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual({group['label'] for group in results},
+                         {'Котики (cats)', 'Котики (other-cats)'})
+
+    def test_submit_group_by_pk(self):
+        """Группа передаётся первичным ключом и проверяется по нему."""
+        url = reverse('posts:post_create')
+        self.authorized_client.post(url, {'text': 'С группой',
+                                          'group': self.group.pk})
+        self.assertTrue(
+            Post.objects.filter(text='С группой', group=self.group).exists())
+        response = self.authorized_client.post(url, {'text': 'Без группы',
+                                                     'group': 10_000})
+        self.assertTrue(response.context['form'].has_error('group'))
+
+    def test_group_named_search(self):
+        """Группа со слагом search открывается своей страницей."""
+        group = Group.objects.create(title='Поиск', slug='search',
+                                     description='')
+        response = self.authorized_client.get(
+            reverse('posts:group_list', args=(group.slug,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['group'], group)
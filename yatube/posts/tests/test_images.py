@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ResponsiveImageTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_feeds_use_lazy_srcset(self):
+        """Ленты отдают набор ширин в JPEG и WebP с ленивой загрузкой."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                for width in settings.POST_IMAGE_WIDTHS:
+                    self.assertContains(response, f'.jpg {width}w')
+                    self.assertContains(response, f'.webp {width}w')
+                self.assertContains(response, 'type="image/webp"')
+                self.assertContains(response, 'width="960" height="339"')
+                self.assertContains(response, 'loading="lazy"')
+
+    def test_variants_created(self):
+        """Для каждой ширины создаются миниатюры обоих форматов."""
+        self.guest_client.get(reverse('posts:index'))
+        created = [
+            name
+            for _, _, filenames in os.walk(os.path.join(TEMP_MEDIA_ROOT,
+                                                        'cache'))
+            for name in filenames
+        ]
+        self.assertEqual(len(created), len(settings.POST_IMAGE_WIDTHS) * 2)
+
+    def test_post_detail_image_not_lazy(self):
+        """Картинка на странице поста загружается сразу."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(response, 'srcset=')
+        self.assertNotContains(response, 'loading="lazy"')
+
+    def test_post_without_image(self):
+        """Пост без картинки не выводит пустой тег."""
+        Post.objects.create(author=self.user, text='Без картинки')
+        response = self.guest_client.get(
+            reverse('posts:profile', args=(self.user.username,)))
+        self.assertContains(response, '<picture>', count=1)
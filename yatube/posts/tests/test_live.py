@@ -0,0 +1,144 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..live import (LATEST_COMMENT_KEY, comment_hub, iter_comment_events,
+                    publish_comment)
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENT_STREAM_TIMEOUT=0.2, COMMENT_STREAM_KEEPALIVE=0.05)
+class CommentStreamTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.comments = [
+            Comment.objects.create(post=cls.post, author=cls.user,
+                                   text=f'Комментарий {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def stream(self, **kwargs):
+        response = self.guest_client.get(
+            reverse('posts:comment_stream', args=(self.post.pk,)), **kwargs)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_missed_comments_replayed(self):
+        """Поток начинается с комментариев после переданного id."""
+        content = self.stream(data={'after': self.comments[0].pk})
+        self.assertNotIn(f'id: {self.comments[0].pk}\n', content)
+        for comment in self.comments[1:]:
+            with self.subTest(comment=comment.pk):
+                self.assertIn(f'id: {comment.pk}\nevent: comment\n', content)
+                self.assertIn(comment.text, content)
+        self.assertIn(': keepalive', content)
+
+    def test_last_event_id_wins(self):
+        """При переподключении учитывается заголовок Last-Event-ID."""
+        content = self.stream(data={'after': 0},
+                              HTTP_LAST_EVENT_ID=str(self.comments[1].pk))
+        self.assertEqual(content.count('event: comment'), 1)
+
+    def test_published_comment_delivered(self):
+        """Опубликованный комментарий приходит подписчикам поста."""
+        events = iter_comment_events(self.post.pk, self.comments[-1].pk)
+        next(events)
+        self.assertEqual(next(events), ': keepalive\n\n')
+        comment = Comment.objects.create(post=self.post, author=self.user,
+                                         text='Свежий комментарий')
+        publish_comment(comment)
+        event = next(events)
+        self.assertTrue(event.startswith(f'id: {comment.pk}\n'))
+        self.assertIn('Свежий комментарий', event)
+        events.close()
+        self.assertEqual(comment_hub.count, 0)
+
+    def test_comments_from_other_processes(self):
+        """С локальным кэшем комментарии других процессов ищутся в базе."""
+        events = iter_comment_events(self.post.pk, self.comments[-1].pk)
+        next(events)
+        next(events)
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='Из соседа'),
+        ])
+        self.assertIn('Из соседа', next(events))
+        events.close()
+
+    def test_poll_updates(self):
+        """Опрос отдаёт комментарии после переданного id."""
+        response = self.guest_client.get(
+            reverse('posts:comment_updates', args=(self.post.pk,)),
+            {'after': self.comments[0].pk})
+        data = response.json()
+        self.assertEqual([comment['id'] for comment in data['comments']],
+                         [comment.pk for comment in self.comments[1:]])
+        self.assertIn(self.comments[1].text, data['comments'][0]['html'])
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text='Новый'),
+        ])
+        response = self.guest_client.get(
+            reverse('posts:comment_updates', args=(self.post.pk,)),
+            {'after': self.comments[0].pk})
+        self.assertEqual(len(response.json()['comments']), 3)
+
+    @mock.patch('posts.live.is_shared_cache', return_value=True)
+    def test_poll_skips_database(self, is_shared_cache):
+        """С общим кэшем пустой опрос не обращается к базе."""
+        cache.set(LATEST_COMMENT_KEY.format(post_id=self.post.pk),
+                  self.comments[-1].pk)
+        url = reverse('posts:comment_updates', args=(self.post.pk,))
+        with self.assertNumQueries(0, using='comments_0'), \
+                self.assertNumQueries(0, using='comments_1'):
+            response = self.guest_client.get(
+                url, {'after': self.comments[-1].pk})
+        self.assertEqual(response.json()['comments'], [])
+        response = self.guest_client.get(url, {'after': self.comments[0].pk})
+        self.assertEqual(len(response.json()['comments']), 2)
+
+    @override_settings(COMMENT_STREAM_MAX_SUBSCRIBERS=0)
+    def test_subscribers_limited(self):
+        """Сверх лимита подписчиков сервер просит переподключиться позже."""
+        response = self.guest_client.get(
+            reverse('posts:comment_stream', args=(self.post.pk,)))
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(response.has_header('Retry-After'))
+
+    def test_post_detail_polls(self):
+        """Страница поста опрашивает комментарии, а не держит поток."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(
+            response, reverse('posts:comment_updates', args=(self.post.pk,)))
+        self.assertNotContains(response, 'EventSource')
+
+
+class CommentPublishTest(TransactionTestCase):
+    databases = '__all__'
+
+    def test_add_comment_publishes(self):
+        """Сохранённый через форму комментарий рассылается после коммита."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(author=user, text='Пост')
+        subscriber = comment_hub.subscribe(post.pk)
+        self.addCleanup(comment_hub.unsubscribe, post.pk, subscriber)
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:add_comment', args=(post.pk,)),
+                    {'text': 'Живой комментарий'})
+        comment_id, html = subscriber.get(timeout=1)
+        self.assertEqual(comment_id, Comment.objects.for_post(post.pk).get().pk)
+        self.assertIn('Живой комментарий', html)
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..caching import get_cached_object_or_404, object_cache_stats
+from ..models import Group
+
+User = get_user_model()
+
+
+class ObjectCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_is_served_from_cache(self):
+        """Повторный поиск автора и группы не обращается к базе."""
+        for model, lookup in ((User, {'username': 'auth'}),
+                              (Group, {'slug': 'test_slug'})):
+            with self.subTest(model=model):
+                get_cached_object_or_404(model, **lookup)
+                with self.assertNumQueries(0):
+                    obj = get_cached_object_or_404(model, **lookup)
+                self.assertEqual(obj, model.objects.get(**lookup))
+
+    def test_missing_object_is_cached(self):
+        """Отсутствующий объект кэшируется до его создания."""
+        with self.assertRaises(Http404):
+            get_cached_object_or_404(User, username='newbie')
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            get_cached_object_or_404(User, username='newbie')
+        User.objects.create_user(username='newbie')
+        self.assertEqual(
+            get_cached_object_or_404(User, username='newbie').username,
+            'newbie'
+        )
+
+    def test_rename_invalidates_cache(self):
+        """Смена username или slug сбрасывает кэш по старому значению."""
+        get_cached_object_or_404(Group, slug='test_slug')
+        self.group.slug = 'renamed'
+        self.group.save()
+        with self.assertRaises(Http404):
+            get_cached_object_or_404(Group, slug='test_slug')
+        self.assertEqual(
+            get_cached_object_or_404(Group, slug='renamed'), self.group)
+
+    def test_delete_invalidates_cache(self):
+        """Удаление группы сбрасывает её кэш."""
+        group = Group.objects.create(title='Удаляемая', slug='gone',
+                                     description='')
+        get_cached_object_or_404(Group, slug='gone')
+        group.delete()
+        with self.assertRaises(Http404):
+            get_cached_object_or_404(Group, slug='gone')
+
+    def test_cache_stats_available_to_staff_only(self):
+        """Статистика кэша доступна только сотрудникам."""
+        get_cached_object_or_404(User, username='auth')
+        get_cached_object_or_404(User, username='auth')
+        url = reverse('posts:cache_stats')
+        self.assertEqual(Client().get(url).status_code, HTTPStatus.FOUND)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff_client = Client()
+        staff_client.force_login(staff)
+        stats = staff_client.get(url).json()['objects']['auth.user']
+        self.assertGreater(stats['hits'], 0)
+        self.assertEqual(stats, object_cache_stats.as_dict()['auth.user'])
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..caching import get_following_ids
+from ..models import ArchivedPost, Change, Comment, Follow, Post
+from ..sharding import get_comment_shard
+from ..sync import COMMENTS
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PurgeUserTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.spammer = User.objects.create_user(username='spammer')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_post = Post.objects.create(author=self.reader,
+                                               text='Обычный пост')
+        self.spam_posts = [
+            Post.objects.create(author=self.spammer, text=f'spam {i}')
+            for i in range(5)
+        ]
+        self.image_post = Post.objects.create(
+            author=self.spammer,
+            text='spam image',
+            image=SimpleUploadedFile('spam.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+        ArchivedPost.objects.create(id=10_000, author=self.spammer,
+                                    text='old spam',
+                                    pub_date=self.reader_post.pub_date)
+        Comment.objects.create(post=self.reader_post, author=self.spammer,
+                               text='spam comment')
+        Comment.objects.create(post=self.spam_posts[0], author=self.reader,
+                               text='reply to spam')
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.reader)
+
+    def assert_purged(self):
+        self.assertFalse(User.objects.filter(username='spammer').exists())
+        self.assertFalse(Post.objects.exclude(author=self.reader).exists())
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(any(comments.exists()
+                             for comments in Comment.objects.in_shards()))
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.reader_post.pk).exists())
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_MEDIA_ROOT, self.image_post.image.name)))
+
+    def test_purge_command(self):
+        """Команда удаляет пользователя со всем содержимым порциями."""
+        self.assertEqual(get_following_ids(self.reader), {self.spammer.pk})
+        out = StringIO()
+        call_command('purge_user', 'spammer', batch_size=2, stdout=out)
+        self.assert_purged()
+        self.assertEqual(get_following_ids(self.reader), frozenset())
+        self.assertIn('удалено постов 7, комментариев 2, картинок 1',
+                      out.getvalue())
+
+    def test_post_comments_purged_in_batches(self):
+        """Комментарии к посту спамера удаляются порциями, а не одним
+        списком."""
+        post = self.spam_posts[1]
+        comments = Comment.objects.bulk_create(
+            Comment(post=post, author=self.reader, text=f'ответ {i}')
+            for i in range(5)
+        )
+        shard = connections[get_comment_shard(post.pk)]
+        with CaptureQueriesContext(shard) as queries:
+            call_command('purge_user', 'spammer', batch_size=2,
+                         stdout=StringIO())
+        self.assert_purged()
+        selects = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith(
+                       'SELECT "posts_comment"."id" FROM')]
+        self.assertTrue(selects)
+        self.assertTrue(all('LIMIT 2' in sql for sql in selects))
+        tombstones = Change.objects.using(shard.alias).filter(
+            resource=COMMENTS, deleted=True,
+            object_id__in=[comment.pk for comment in comments])
+        self.assertEqual(tombstones.count(), len(comments))
+
+    def test_purge_admin_action(self):
+        """Действие в админке удаляет пользователя со всем содержимым."""
+        admin = User.objects.create_superuser('admin', 'admin@ya.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'purge',
+            '_selected_action': [self.spammer.pk],
+        })
+        self.assert_purged()
@@ -0,0 +1,72 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+TEXT_END = 'конец длинного поста'
+LONG_TEXT = 'Длинный <b>пост</b>\n' + 'слово ' * 1000 + TEXT_END
+
+
+class PostTextRenderTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text=LONG_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_html_and_excerpt_rendered_on_save(self):
+        """HTML и анонс поста формируются при сохранении."""
+        self.assertEqual(
+            self.post.text_html[:35],
+            'Длинный &lt;b&gt;пост&lt;/b&gt;<br>'
+        )
+        self.assertLess(len(self.post.excerpt), len(LONG_TEXT))
+        self.assertTrue(self.post.excerpt.endswith('…'))
+
+    def test_feed_does_not_load_full_text(self):
+        """Лента выводит анонс и не загружает полный текст поста."""
+        response = self.guest_client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertEqual(post.get_deferred_fields(), {'text', 'text_html'})
+        self.assertNotContains(response, TEXT_END)
+
+    def test_post_detail_shows_full_text(self):
+        """Страница поста выводит полный текст."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, TEXT_END)
+
+    def test_backfill_command(self):
+        """Команда заполняет HTML и анонс старых постов."""
+        Post.objects.filter(pk=self.post.pk).update(text_html='', excerpt='')
+        call_command('render_post_text', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text_html, self.post.text_html)
+        self.assertEqual(post.excerpt, self.post.excerpt)
+
+    def test_backfill_migration(self):
+        """Миграция заполняет HTML и анонс постов, сохранённых до неё."""
+        Post.objects.filter(pk=self.post.pk).update(text_html='', excerpt='')
+        migration = import_module('posts.migrations.0026_backfill_text_html')
+        migration.backfill_text_html(apps, mock.Mock(connection=connection))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text_html, self.post.text_html)
+        self.assertEqual(post.excerpt, self.post.excerpt)
@@ -0,0 +1,135 @@
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..sharding import COMMENT_ID_STRIDE, get_comment_shard, get_shard_index
+
+User = get_user_model()
+
+
+class CommentShardingTest(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        posts = [Post.objects.create(author=self.user, text=f'Пост {i}')
+                 for i in range(2)]
+        self.even_post, self.odd_post = sorted(
+            posts, key=lambda post: post.pk % 2)
+
+    def shard_texts(self, alias):
+        return set(Comment.objects.using(alias).values_list('text',
+                                                            flat=True))
+
+    def test_comments_stored_on_post_shard(self):
+        """Комментарии хранятся в шарде своего поста."""
+        Comment.objects.create(post=self.even_post, author=self.user,
+                               text='Чётный')
+        Comment.objects.create(post=self.odd_post, author=self.user,
+                               text='Нечётный')
+        self.assertEqual(self.shard_texts('comments_0'), {'Чётный'})
+        self.assertEqual(self.shard_texts('comments_1'), {'Нечётный'})
+        self.assertEqual(self.shard_texts('default'), set())
+        self.assertEqual(
+            list(self.odd_post.comments.values_list('text', flat=True)),
+            ['Нечётный']
+        )
+
+    def test_add_comment_writes_to_shard(self):
+        """Комментарий из формы попадает в шард поста и виден на странице."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.odd_post.pk,)),
+            {'text': 'Из формы'},
+        )
+        self.assertEqual(self.shard_texts('comments_1'), {'Из формы'})
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.odd_post.pk,)))
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Из формы']
+        )
+
+    def test_ids_unique_across_shards(self):
+        """Идентификаторы комментариев не повторяются между шардами."""
+        comments = [
+            Comment.objects.create(post=post, author=self.user, text='...')
+            for post in (self.even_post, self.odd_post) * 2
+        ]
+        comments += Comment.objects.bulk_create(
+            Comment(post=post, author=self.user, text='...')
+            for post in (self.even_post, self.odd_post)
+        )
+        ids = [comment.pk for comment in comments]
+        self.assertEqual(len(ids), len(set(ids)))
+        for comment in comments:
+            self.assertEqual(
+                comment.pk % COMMENT_ID_STRIDE,
+                get_shard_index(get_comment_shard(comment.post_id)))
+
+    def test_comment_writes_skip_default(self):
+        """Запись комментария не пишет в общую базу."""
+        with CaptureQueriesContext(connections['default']) as queries:
+            comment = Comment.objects.create(post=self.odd_post,
+                                             author=self.user, text='Тихий')
+            comment.delete()
+        self.assertEqual(
+            [query['sql'] for query in queries
+             if not query['sql'].startswith('SELECT')],
+            []
+        )
+
+    def test_migration_moves_comments(self):
+        """Миграция переносит комментарии из общей базы в шард."""
+        migration = import_module('posts.migrations.0025_shard_local_writes')
+        for post in (self.even_post, self.odd_post):
+            Comment(post=post, author=self.user,
+                    text=f'Старый {post.pk % 2}').save(using='default')
+        migration.move_comments(apps, 'comments_1')
+        self.assertEqual(self.shard_texts('default'), {'Старый 0'})
+        self.assertEqual(self.shard_texts('comments_1'), {'Старый 1'})
+
+    def test_migration_reads_only_own_shard(self):
+        """Миграция шарда читает только общую базу и сам шард."""
+        migration = import_module('posts.migrations.0025_shard_local_writes')
+        with mock.patch.object(migration, 'has_table',
+                               wraps=migration.has_table) as has_table:
+            migration.get_last_comment_id(apps, 'comments_0')
+        self.assertEqual({call[0][0] for call in has_table.call_args_list},
+                         {'default', 'comments_0'})
+
+    def test_post_delete_removes_comments(self):
+        """Удаление поста удаляет его комментарии из шарда."""
+        Comment.objects.create(post=self.odd_post, author=self.user,
+                               text='Удалить')
+        post_id = self.odd_post.pk
+        self.odd_post.delete()
+        self.assertFalse(Comment.objects.for_post(post_id).exists())
+
+    def test_rebalance_command(self):
+        """Команда переносит комментарии из общей базы в их шарды."""
+        for post in (self.even_post, self.odd_post):
+            Comment(post=post, author=self.user,
+                    text=f'Старый {post.pk % 2}').save(using='default')
+        call_command('rebalance_comments', dry_run=True, stdout=StringIO())
+        self.assertEqual(len(self.shard_texts('default')), 2)
+        created = Comment.objects.using('default').get(text='Старый 1').created
+        call_command('rebalance_comments', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.shard_texts('default'), set())
+        self.assertEqual(self.shard_texts('comments_0'), {'Старый 0'})
+        self.assertEqual(self.shard_texts('comments_1'), {'Старый 1'})
+        self.assertEqual(get_comment_shard(self.odd_post.pk), 'comments_1')
+        self.assertEqual(
+            Comment.objects.for_post(self.odd_post.pk).get().created, created)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Post
+from ..views import serve_media
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+DIGEST = hashlib.sha256(SMALL_GIF).hexdigest()
+HASHED_NAME = f'posts/{DIGEST[:2]}/{DIGEST[2:4]}/{DIGEST}.gif'
+
+
+def media_path(name):
+    return os.path.join(TEMP_MEDIA_ROOT, name)
+
+
+def upload(name):
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(author=self.user, text='Пост',
+                                   image=image)
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post(upload('first.gif'))
+        second = self.create_post(upload('second.gif'))
+        self.assertEqual(first.image.name, HASHED_NAME)
+        self.assertEqual(second.image.name, HASHED_NAME)
+        self.assertEqual(
+            os.listdir(os.path.dirname(media_path(HASHED_NAME))),
+            [os.path.basename(HASHED_NAME)],
+        )
+        self.assertEqual(
+            get_thumbnail(first.image, '960x339', crop='center').name,
+            get_thumbnail(second.image, '960x339', crop='center').name,
+        )
+
+    def test_identical_upload_touches_file(self):
+        """Повторная загрузка тех же байтов обновляет время файла."""
+        self.create_post(upload('first.gif'))
+        os.utime(media_path(HASHED_NAME), (0, 0))
+        self.create_post(upload('second.gif'))
+        self.assertGreater(os.stat(media_path(HASHED_NAME)).st_mtime, 0)
+
+    def test_shared_file_released_with_last_post(self):
+        """Файл удаляется только вместе с последним постом."""
+        first = self.create_post(upload('first.gif'))
+        second = self.create_post(upload('second.gif'))
+        first.delete()
+        self.assertTrue(os.path.exists(media_path(HASHED_NAME)))
+        second.delete()
+        self.assertFalse(os.path.exists(media_path(HASHED_NAME)))
+
+    def test_replaced_image_released(self):
+        """Заменённая картинка удаляется, если больше не используется."""
+        post = self.create_post(upload('first.gif'))
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF + b'\x00',
+                                        content_type='image/gif')
+        post.save()
+        self.assertNotEqual(post.image.name, HASHED_NAME)
+        self.assertFalse(os.path.exists(media_path(HASHED_NAME)))
+        self.assertTrue(os.path.exists(media_path(post.image.name)))
+
+    def test_content_addressed_media_cached_forever(self):
+        """Файлы с хешем в имени отдаются с неизменяемым Cache-Control."""
+        post = self.create_post(upload('first.gif'))
+        legacy_name = 'posts/legacy.gif'
+        with open(media_path(legacy_name), 'wb') as legacy:
+            legacy.write(SMALL_GIF)
+        request = RequestFactory().get('/media/')
+        response = serve_media(request, post.image.name)
+        self.assertIn('immutable', response['Cache-Control'])
+        response = serve_media(request, legacy_name)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_dedupe_media_command(self):
+        """Команда переименовывает старые файлы и склеивает дубликаты."""
+        legacy_names = ('posts/one.gif', 'posts/two.gif')
+        for name in legacy_names:
+            os.makedirs(os.path.dirname(media_path(name)), exist_ok=True)
+            with open(media_path(name), 'wb') as legacy:
+                legacy.write(SMALL_GIF)
+            Post.objects.create(author=self.user, text='Старый пост',
+                                image=name)
+        Post.objects.create(author=self.user, text='Потерянный файл',
+                            image='posts/missing.gif')
+        out = StringIO()
+        call_command('dedupe_media', batch_size=1, stdout=out,
+                     stderr=StringIO())
+        self.assertEqual(
+            Post.objects.filter(image=HASHED_NAME).count(), 2)
+        for name in legacy_names:
+            with self.subTest(name=name):
+                self.assertFalse(os.path.exists(media_path(name)))
+        self.assertTrue(os.path.exists(media_path(HASHED_NAME)))
+        self.assertIn('Файлов после переименования: 1, пропущено: 1',
+                      out.getvalue())
@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counters import view_counter
+from ..models import Comment, Post, TrendingPost
+
+User = get_user_model()
+
+
+class ViewCounterTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.other_post = Post.objects.create(author=cls.user, text='Другой')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.clear()
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_views_are_buffered(self):
+        """Просмотры копятся в памяти и не пишутся в базу на каждый запрос."""
+        for _ in range(3):
+            Client().get(self.url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+        view_counter.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 3)
+
+    def test_cached_pages_are_counted(self):
+        """Просмотры страниц из кэша тоже учитываются."""
+        client = Client()
+        client.get(self.url)
+        with self.assertNumQueries(0):
+            client.get(self.url)
+        view_counter.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_flush_batches_updates(self):
+        """Сброс группирует посты с одинаковым приростом в один UPDATE."""
+        view_counter.add(self.post.pk)
+        view_counter.add(self.other_post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            view_counter.flush()
+        updates = [query for query in queries
+                   if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('views', flat=True)),
+            [1, 1]
+        )
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_flush_on_interval(self):
+        """Буфер сбрасывается по истечении интервала."""
+        Client().get(self.url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+
+class TrendingTest(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.viewed = Post.objects.create(author=cls.user, text='Просмотры')
+        cls.discussed = Post.objects.create(author=cls.user, text='Обсуждение')
+        cls.quiet = Post.objects.create(author=cls.user, text='Тишина')
+        Post.objects.filter(pk=cls.viewed.pk).update(views=3)
+        Post.objects.filter(pk=cls.discussed.pk).update(views=1)
+        Comment.objects.create(post=cls.discussed, author=cls.user,
+                               text='Коммент')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_update_trending_ranks_posts(self):
+        """Команда ранжирует посты по просмотрам и комментариям."""
+        call_command('update_trending', stdout=StringIO())
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post_id', flat=True)),
+            [self.discussed.pk, self.viewed.pk]
+        )
+        response = Client().get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.discussed, self.viewed])
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_update_trending_keeps_top(self):
+        """В рейтинг попадают только лучшие TRENDING_SIZE постов."""
+        call_command('update_trending', stdout=StringIO())
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post_id', flat=True)),
+            [self.discussed.pk]
+        )
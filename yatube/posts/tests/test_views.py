@@ -1,6 +1,7 @@
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -10,6 +11,8 @@ User = get_user_model()
 
 
 class PostPagesTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -143,6 +146,7 @@ class PaginatorViewsTest(TestCase):
                              group=cls.group) for i in range(1, 15)]
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.templates_page_names = {
             'index': reverse('posts:index'),
@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.metrics import registry
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmCacheCommandTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            group=self.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'),
+        )
+
+    def test_warm_cache_renders_pages_and_thumbnails(self):
+        """Команда рендерит ленты, группы, профили и создает миниатюры."""
+        out = StringIO()
+        call_command('warm_cache', workers=2, stdout=out, stderr=StringIO())
+        self.assertIn('Прогрето страниц: 3 из 3', out.getvalue())
+        self.assertTrue(
+            default.kvstore._get(ImageFile(self.post.image).key,
+                                 identity='thumbnails')
+        )
+
+    def test_warmed_pages_hit_for_visitors(self):
+        """Прогретые страницы отдаются посетителям из кэша."""
+        err = StringIO()
+        call_command('warm_cache', workers=1, host='localhost',
+                     stdout=StringIO(), stderr=err)
+        self.assertIn('только миниатюры', err.getvalue())
+        registry.reset()
+        response = Client().get(reverse('posts:index'), HTTP_HOST='localhost',
+                                HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response.status_code, 200)
+        metrics = Client().get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_cache_requests_total{cache="page",'
+                      'result="hit"} 1', metrics)
+        self.assertIn('yatube_cache_requests_total{cache="page_variant",'
+                      'result="hit"} 1', metrics)
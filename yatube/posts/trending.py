@@ -0,0 +1,59 @@
+import heapq
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Comment, Post, TrendingPost
+
+
+def get_trending_score(views, comments, age_hours):
+    return ((views + settings.TRENDING_COMMENT_WEIGHT * comments)
+            / (age_hours + 2) ** settings.TRENDING_GRAVITY)
+
+
+def count_comments(since):
+    """Comments per post written after ``since``, summed over the shards."""
+    counts = Counter()
+    for comments in Comment.objects.in_shards():
+        counts.update(dict(
+            comments.filter(created__gte=since).order_by()
+            .values('post_id').annotate(count=Count('pk'))
+            .values_list('post_id', 'count')
+        ))
+    return counts
+
+
+def update_trending():
+    """Rank recent posts by views and comments decayed with post age.
+
+    A comment is never older than its post, so the comments of the window
+    are counted on every shard with the same date filter instead of being
+    joined to the posts.
+    """
+    now = timezone.now()
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    comment_counts = count_comments(since)
+    candidates = (
+        Post.objects.filter(pub_date__gte=since)
+        .values_list('pk', 'views', 'pub_date')
+    )
+    # Only the top of the ranking is kept, in a heap of TRENDING_SIZE.
+    scores = heapq.nlargest(
+        settings.TRENDING_SIZE,
+        (
+            (get_trending_score(views, comment_counts[pk],
+                                (now - pub_date).total_seconds() / 3600), pk)
+            for pk, views, pub_date in candidates.iterator()
+            if views or comment_counts[pk]
+        ),
+    )
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            TrendingPost(post_id=pk, score=score) for score, pk in scores
+        )
+    return len(scores)
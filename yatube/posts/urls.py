@@ -1,16 +1,43 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, live, views
 
 app_name = 'posts'
 
 
 urlpatterns = [
+    path('group/', views.group_directory, name='group_directory'),
+    path('groups/search/', views.group_search, name='group_search'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
+    path('posts/<int:post_id>/comments/', live.comment_updates,
+         name='comment_updates'),
+    path('posts/<int:post_id>/comments/stream/', live.comment_stream,
+         name='comment_stream'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('trending/', views.trending, name='trending'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('profile/<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('profile/<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
+    path('feeds/rss/', feeds.latest_posts_rss, name='feed_rss'),
+    path('feeds/atom/', feeds.latest_posts_atom, name='feed_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_posts_rss,
+         name='group_feed_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_posts_atom,
+         name='group_feed_atom'),
+    path('profile/<str:username>/rss/', feeds.author_posts_rss,
+         name='profile_feed_rss'),
+    path('profile/<str:username>/atom/', feeds.author_posts_atom,
+         name='profile_feed_atom'),
+    path('sitemap.xml', feeds.sitemap_index, name='sitemap'),
+    path('sitemap-<int:page>.xml', feeds.sitemap, name='sitemap_page'),
+    path('api/v1/sync/', api.sync, name='api_sync'),
+    path('api/v1/<slug:resource>/', api.fetch, name='api_fetch'),
+    path('internal/cache-stats/', views.cache_stats, name='cache_stats'),
     path('', views.index, name='index'),
 ]
@@ -1,29 +1,102 @@
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.static import serve
+from sorl.thumbnail.conf import settings as thumbnail_settings
 
+from core.ratelimit import rate_limit
+
+from .archive import ArchiveFallbackList
+from .caching import (get_cached_object_or_404, get_follow_posts_count,
+                      get_following_ids, get_group_directory,
+                      object_cache_stats)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User
+from .models import ArchivedPost, Follow, Group, Post, User
+from .storage import is_content_addressed
+from .widgets import get_group_label
+
+FEED_DEFERRED_FIELDS = ('text', 'text_html')
+
+
+def get_feed(posts):
+    return posts.select_related('author', 'group').defer(
+        *FEED_DEFERRED_FIELDS)
 
 
-def get_page_obj(request, posts):
+def get_page_obj(request, posts, count=None):
     paginator = Paginator(posts, settings.POST_COUNT)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+def get_follow_posts(user):
+    following = get_following_ids(user)
+    posts = get_feed(Post.objects.all())
+    if not following:
+        return posts.none()
+    if len(following) <= settings.FOLLOW_FEED_INLINE_LIMIT:
+        return posts.filter(author__in=following)
+    return posts.annotate(
+        followed=Exists(Follow.objects.filter(user=user,
+                                              author=OuterRef('author')))
+    ).filter(followed=True)
+
+
 def index(request):
-    page_obj = get_page_obj(request, Post.objects.all())
+    posts = ArchiveFallbackList(get_feed(Post.objects.all()),
+                                get_feed(ArchivedPost.objects.all()))
+    page_obj = get_page_obj(request, posts)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    posts = get_feed(Post.objects.filter(trending__isnull=False)).order_by(
+        '-trending__score')
+    page_obj = get_page_obj(request, posts)
+    return render(request, 'posts/trending.html', {'page_obj': page_obj})
+
+
+def group_directory(request):
+    return render(request, 'posts/group_directory.html',
+                  {'groups': get_group_directory()})
+
+
+def get_prefix_range(prefix):
+    """Bounds of the strings starting with ``prefix``, for an index scan."""
+    return prefix, prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 0x10FFFF))
+
+
+def group_search(request):
+    query = request.GET.get('q', '').strip().lower()
+    groups = []
+    if query:
+        start, stop = get_prefix_range(query)
+        groups = list(
+            Group.objects.filter(search_title__gte=start,
+                                 search_title__lt=stop)
+            .order_by('search_title')
+            .values('id', 'title', 'slug')[:settings.GROUP_SEARCH_LIMIT]
+        )
+        for group in groups:
+            group['label'] = get_group_label(group['title'], group['slug'])
+    return JsonResponse({'results': groups},
+                        json_dumps_params={'ensure_ascii': False})
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    page_obj = get_page_obj(request, group.posts.all())
+    group = get_cached_object_or_404(Group, slug=slug)
+    posts = ArchiveFallbackList(get_feed(group.posts.all()),
+                                get_feed(group.archived_posts.all()))
+    page_obj = get_page_obj(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -32,29 +105,48 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = get_cached_object_or_404(User, username=username)
+    post_list = ArchiveFallbackList(get_feed(author.posts.all()),
+                                    get_feed(author.archived_posts.all()))
     page_obj = get_page_obj(request, post_list)
+    following = (
+        request.user.is_authenticated
+        and author.pk in get_following_ids(request.user)
+    )
     context = {
         'page_obj': page_obj,
         'author': author,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-
+    post = Post.objects.select_related('author', 'group').defer(
+        'text').filter(pk=post_id).first()
+    archived = post is None
+    if archived:
+        post = get_object_or_404(
+            ArchivedPost.objects.select_related('author', 'group').defer(
+                'text'),
+            pk=post_id
+        )
+    author_posts_count = (post.author.posts.count()
+                          + post.author.archived_posts.count())
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post.objects.select_related('author'),
-                                  pk=post_id),
+        'post': post,
+        'archived': archived,
+        'author_posts_count': author_posts_count,
         'form': CommentForm(request.POST or None),
-        'comments': get_object_or_404(Post, id=post_id).comments.all()
+        'comments': post.comments.prefetch_related('author'),
+        'comment_poll_interval': settings.COMMENT_POLL_INTERVAL,
     })
 
 
+@rate_limit('write')
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(commit=False)
@@ -63,6 +155,7 @@ def post_create(request):
     return redirect('posts:profile', username=request.user.username)
 
 
+@rate_limit('write')
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -80,6 +173,7 @@ def post_edit(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@rate_limit('write')
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
@@ -90,3 +184,46 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    posts = get_follow_posts(request.user)
+    count = None
+    following = get_following_ids(request.user)
+    if len(following) > settings.FOLLOW_FEED_INLINE_LIMIT:
+        count = get_follow_posts_count(request.user, posts)
+    page_obj = get_page_obj(request, posts, count)
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+@rate_limit('write', methods=('GET', 'POST'))
+@login_required
+def profile_follow(request, username):
+    author = get_cached_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@rate_limit('write', methods=('GET', 'POST'))
+@login_required
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    return redirect('posts:profile', username=username)
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse({'objects': object_cache_stats.as_dict()})
+
+
+def serve_media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if (is_content_addressed(path)
+            or path.startswith(thumbnail_settings.THUMBNAIL_PREFIX)):
+        response['Cache-Control'] = (
+            f'public, max-age={settings.IMMUTABLE_MEDIA_MAX_AGE}, immutable')
+    return response
@@ -0,0 +1,39 @@
+from django import forms
+from django.conf import settings
+from django.urls import reverse
+
+
+def get_group_label(title, slug):
+    """What the picker shows for a group; titles alone may repeat."""
+    return f'{title} ({slug})'
+
+
+class GroupSearchWidget(forms.Widget):
+    """Search-as-you-type group picker for a ``ModelChoiceField``.
+
+    Submits the group pk from a hidden input, so validation stays a single
+    lookup by primary key. Only the label of the selected group is read
+    when rendering; matches are fetched from ``posts:group_search`` while
+    typing instead of embedding every group as an ``<option>``.
+    """
+
+    template_name = 'posts/widgets/group_search.html'
+
+    def get_label(self, value):
+        if value is None or not str(value).isdigit():
+            return ''
+        group = (self.choices.queryset.filter(pk=value)
+                 .values_list('title', 'slug').first())
+        return get_group_label(*group) if group else ''
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'label': self.get_label(context['widget']['value']),
+            'search_url': reverse('posts:group_search'),
+            'search_delay': settings.GROUP_SEARCH_DELAY,
+        })
+        return context
+
+    def id_for_label(self, id_):
+        return f'{id_}_search' if id_ else id_
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.purge import purge_user
+
+User = get_user_model()
+
+
+class PurgeUserAdmin(UserAdmin):
+    actions = ('purge',)
+
+    def purge(self, request, queryset):
+        for user in queryset:
+            stats = purge_user(user, settings.PURGE_BATCH_SIZE)
+            self.message_user(
+                request,
+                f"{user.username}: удалено постов {stats['posts']}, "
+                f"комментариев {stats['comments']}"
+            )
+    purge.short_description = 'Удалить вместе со всем содержимым'
+
+
+admin.site.unregister(User)
+admin.site.register(User, PurgeUserAdmin)
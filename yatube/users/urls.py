@@ -1,26 +1,29 @@
 from django.contrib.auth.views import LoginView, LogoutView, PasswordResetView
 from django.urls import path
 
+from core.ratelimit import rate_limit
+
 from . import views
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path('signup/', rate_limit('auth')(views.SignUp.as_view()), name='signup'),
     path(
         'logout/', LogoutView.as_view(template_name='users/logged_out.html'),
         name='logout'
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        rate_limit('auth')(
+            LoginView.as_view(template_name='users/login.html')),
         name='login'
     ),
     path(
         'password_reset_form/',
-        PasswordResetView.as_view(
+        rate_limit('auth')(PasswordResetView.as_view(
             template_name='users/password_reset_form.html'
-        ),
+        )),
         name='password_reset_form'
     ),
 ]
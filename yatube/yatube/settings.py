@@ -46,11 +46,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.forms',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.MemoryMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'posts.middleware.PostViewCountMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +69,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,6 +83,7 @@ TEMPLATES = [
         },
     },
 ]
+FORM_RENDERER = 'django.forms.renderers.TemplatesSetting'
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -91,6 +98,31 @@ DATABASES = {
     }
 }
 
+COMMENT_SHARD_COUNT = int(os.environ.get('YATUBE_COMMENT_SHARDS', 2))
+COMMENT_SHARDS = tuple(
+    f'comments_{shard}' for shard in range(COMMENT_SHARD_COUNT)
+) or ('default',)
+for alias in COMMENT_SHARDS:
+    DATABASES.setdefault(alias, {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'{alias}.sqlite3'),
+    })
+
+DATABASE_ROUTERS = ['posts.sharding.CommentShardRouter']
+
+
+PASSWORD_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('YATUBE_PASSWORD_ITERATIONS', 150000))
+PASSWORD_HASHING_WORKERS = int(os.environ.get('YATUBE_HASHING_WORKERS', 2))
+PASSWORD_HASHING_MAX_PENDING = 32
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -142,11 +174,173 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POST_COUNT = 10
+POST_EXCERPT_LENGTH = 300
+POST_IMAGE_SIZE = (960, 339)
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_SIZES = '(max-width: 992px) 100vw, 960px'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Production needs a cache shared by all workers, e.g.
+# django.core.cache.backends.memcached.MemcachedCache: invalidations,
+# locks and new comment notifications do not leave a process otherwise.
+# Page, feed and object invalidations reach every worker only through a
+# shared backend; `check --deploy` warns about a process-local one.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.environ.get(
+            'YATUBE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('YATUBE_CACHE_LOCATION', ''),
     }
 }
+
+CACHE_STALE_TIMEOUT = 60 * 5
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_POLL_INTERVAL = 0.05
+# How long a key whose last value was not cacheable skips the lock.
+CACHE_UNCACHED_TIMEOUT = 60
+CACHE_EARLY_RECOMPUTE_BETA = 1.0
+
+FOLLOW_SET_CACHE_TIMEOUT = 60 * 60
+FOLLOW_FEED_INLINE_LIMIT = 100
+FOLLOW_FEED_COUNT_LIMIT = 1000
+FOLLOW_FEED_COUNT_TIMEOUT = 60 * 5
+
+POST_ARCHIVE_AGE_DAYS = 365
+POST_ARCHIVE_BATCH_SIZE = 500
+
+WARM_CACHE_PAGES = 3
+WARM_CACHE_AUTHORS = 20
+WARM_CACHE_WORKERS = 4
+WARM_CACHE_HOST = os.environ.get('YATUBE_HOST', 'localhost')
+WARM_CACHE_SCHEME = os.environ.get('YATUBE_SCHEME', 'http')
+
+STARTUP_TIME_BUDGET = 3.0
+
+OBJECT_CACHE_TIMEOUT = 60 * 60
+OBJECT_CACHE_NEGATIVE_TIMEOUT = 60
+
+GROUP_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+GROUP_SEARCH_LIMIT = 10
+GROUP_SEARCH_DELAY = 200
+
+ANON_PAGE_CACHE_TIMEOUT = 60 * 5
+ANON_PAGE_CACHE_NAMESPACES = ('posts', 'about')
+# Live and cursor-based endpoints must always answer with the latest data.
+ANON_PAGE_CACHE_EXCLUDED_VIEWS = ('posts:comment_updates',
+                                  'posts:comment_stream',
+                                  'posts:api_sync',
+                                  'posts:api_fetch')
+# Pages that also go stale on their own scope, e.g. a post on its comments.
+ANON_PAGE_CACHE_SCOPES = {
+    'posts:post_detail': 'post:{post_id}',
+}
+
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+COMPRESSION_CACHED_LEVELS = {'br': 11, 'gzip': 9}
+
+VIEW_COUNT_FLUSH_INTERVAL = 30
+VIEW_COUNT_FLUSH_THRESHOLD = 1000
+
+TRENDING_WINDOW_DAYS = 7
+TRENDING_SIZE = 100
+TRENDING_COMMENT_WEIGHT = 5
+TRENDING_GRAVITY = 1.5
+
+PURGE_BATCH_SIZE = 500
+
+MEDIA_GC_WORKERS = 8
+MEDIA_GC_RATE = 100
+MEDIA_GC_MIN_AGE = 60 * 60 * 24
+
+IMMUTABLE_MEDIA_MAX_AGE = 60 * 60 * 24 * 365
+
+COMMENT_STREAM_TIMEOUT = 60 * 5
+COMMENT_STREAM_KEEPALIVE = 15
+COMMENT_STREAM_RETRY = 3000
+COMMENT_STREAM_REPLAY_LIMIT = 50
+COMMENT_STREAM_MAX_SUBSCRIBERS = 20
+COMMENT_POLL_INTERVAL = 15000
+
+API_SYNC_LIMIT = 500
+API_FETCH_LIMIT = 100
+
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+FEED_CACHE_MAX_SIZE = 1024 * 1024
+SITEMAP_CHUNK_SIZE = 2000
+# Post ids per sitemap page: under the protocol's 50,000 URLs per file
+# and small enough for a page to fit in FEED_CACHE_MAX_SIZE.
+SITEMAP_PAGE_SIZE = 5000
+
+METRICS_DIR = os.environ.get('YATUBE_METRICS_DIR', '')
+METRICS_DUMP_INTERVAL = 10
+# Scrapers send it as "Authorization: Bearer <token>". Without a token only
+# METRICS_ALLOWED_IPS may scrape, and never through a reverse proxy.
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+METRICS_VIEW_NAMESPACES = ('posts', 'users', 'about')
+THUMBNAIL_BACKEND = 'core.backends.TimedThumbnailBackend'
+
+RATE_LIMITS = {
+    'write': {'user': '30/m', 'ip': '120/m'},
+    'auth': {'ip': '10/m'},
+    'poll': {'user': '20/m', 'ip': '600/m'},
+    'stream': {'user': '5/m', 'ip': '60/m'},
+}
+# Behind reverse proxies: how many of them there are and the header they
+# pass the client address in, e.g. HTTP_X_FORWARDED_FOR.
+TRUSTED_PROXY_COUNT = int(os.environ.get('YATUBE_TRUSTED_PROXIES', 0))
+CLIENT_IP_HEADER = os.environ.get('YATUBE_CLIENT_IP_HEADER',
+                                  'HTTP_X_FORWARDED_FOR')
+
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_EXPLAIN_INTERVAL = 60 * 5
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+MEMORY_TRACE = bool(os.environ.get('YATUBE_TRACEMALLOC'))
+MEMORY_TRACE_FRAMES = 10
+MEMORY_PEAK_THRESHOLD = 10 * 1024 * 1024
+MEMORY_SNAPSHOT_LIMIT = 5
+MEMORY_DIFF_LIMIT = 20
+MEMORY_LOG = os.path.join(BASE_DIR, 'memory.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+        'memory': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': MEMORY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'yatube.memory': {
+            'handlers': ['memory'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
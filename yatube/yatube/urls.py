@@ -1,20 +1,30 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.contrib.auth import urls as auth_urls
+from django.urls import include, path, re_path
+
+from core.ratelimit import rate_limit, rate_limit_patterns
+from core.views import memory, metrics
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
 urlpatterns = [
+    path('admin/login/', rate_limit('auth')(admin.site.login),
+         name='admin_login'),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
-    path('auth/', include('django.contrib.auth.urls')),
+    path('auth/', include(rate_limit_patterns('auth', auth_urls.urlpatterns))),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
+    path('internal/memory/', memory, name='memory'),
     path('', include('posts.urls', namespace='posts')),
 ]
 if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+    from posts.views import serve_media
+
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'),
+                serve_media),
+    ]